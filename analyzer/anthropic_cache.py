@@ -16,7 +16,7 @@ from analyzer.config import default_config
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class CachedFile:
     """Represents a cached Anthropic file upload."""
     file_id: str
@@ -5,7 +5,11 @@ class Config(BaseSettings):
     EXTRACTION_DIR: str = "extraction"
     EXTRACTION_TEXT_FILE: str = "text.txt"
     EXTRACTION_IMAGE_DIR: str = "images"
+    EXTRACTION_IMAGE_KEEP_ORIGINAL: bool = True  # write embedded PNG/JPEG bytes as-is; False forces PNG re-encode
     EXTRACTION_VECTOR_GRAPHICS_DIR: str = "vector_graphics"
+    VECTOR_GRAPHICS_DPI: int = 150  # rasterization dpi for vector figures
+    VECTOR_GRAPHICS_LARGE_DPI: int = 200  # dpi for figures covering more than half of the page
+    VECTOR_GRAPHICS_PNG_COMPRESS_LEVEL: int = 1  # zlib level for figure PNGs (previews, favour speed)
     EXTRACTION_FIGURES_PARQUET_FILE: str = "figures_metadata.parquet"
     EXTRACTION_LUCENE_INDEX_DIR: str = "lucene_index"
     EXTRACTION_CHUNK_SIZE: int = 500 * 4  # number of characters per text chunk (500 tokens * 4 chars/token)
@@ -14,11 +18,18 @@ class Config(BaseSettings):
     EXTRACTION_FAISS_DIR: str = "faiss_index"
     EXTRACTION_FAISS_IMAGES_DIR: str = "faiss_index_images"
     PDF_DIR: str = "pdf_files"
+    EXTRACTION_MAX_WORKERS: int = 4  # processes extracting PDFs in parallel in main.py; 0 = one per CPU
     
     # FAISS Configuration
     FAISS_EMBEDDING_MODEL: str = "google/embeddinggemma-300m"
     FAISS_DISTANCE_STRATEGY: str = "MAX_INNER_PRODUCT"  # Optimized for inner product search
     FAISS_SEARCH_K: int = 5  # Default number of results to return in searches
+    FAISS_QUANTIZATION: str = "SQ8"  # Vector encoding of new indexes: "SQ8" (int8), "SQfp16" or "none" (float32)
+    FAISS_QUERY_EMBEDDING_CACHE_SIZE: int = 1024  # Query embeddings kept in memory, shared by all indexes
+    FAISS_SEMANTIC_CACHE_SIZE: int = 64  # Recent search_vector queries per document reused for rephrasings; 0 disables
+    FAISS_SEMANTIC_CACHE_MIN_SIMILARITY: float = 0.95  # Query embedding cosine similarity at which cached hits are reused
+    FAISS_QUERY_EMBEDDING_DB: str = os.path.join(".cache", "query_embeddings.sqlite")  # Persisted query embeddings; "" disables
+    FAISS_QUERY_EMBEDDING_DB_MAX_ROWS: int = 20000  # Persisted query embeddings kept, least recently used dropped first
     ANTHROPIC_API_KEY: str = ""
     
     # Anthropic Files API Configuration
@@ -1,7 +1,15 @@
 import os
+import pickle
+import hashlib
 import logging
-from typing import List, Tuple, Optional
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Tuple, Optional
 
+import faiss
+import numpy as np
 import pandas as pd
 from langchain_core.documents.base import Document
 from langchain_community.vectorstores import FAISS
@@ -11,6 +19,118 @@ from analyzer.config import default_config
 
 logger = logging.getLogger(__name__)
 
+# File stem LangChain's FAISS.save_local uses for <stem>.faiss / <stem>.pkl
+_INDEX_NAME = "index"
+
+# FAISS_QUANTIZATION values -> scalar quantizer used to encode newly built indexes
+_SCALAR_QUANTIZERS = {
+    "SQ8": faiss.ScalarQuantizer.QT_8bit,
+    "SQfp16": faiss.ScalarQuantizer.QT_fp16,
+}
+
+# (embedding model, query) -> query embedding, least recently used first. Shared by all
+# wrappers, so the text and image caption indexes embed a repeated query only once
+_query_embeddings: "OrderedDict[Tuple[str, str], List[float]]" = OrderedDict()
+_query_embeddings_lock = threading.Lock()
+
+# Behind the in-memory LRU: query embeddings persisted in FAISS_QUERY_EMBEDDING_DB, so a
+# restarted process does not embed every previously seen query again
+_embedding_db: Optional[sqlite3.Connection] = None
+_embedding_db_opened = False
+_embedding_db_lock = threading.Lock()
+# Rows written since the table was last cut back to FAISS_QUERY_EMBEDDING_DB_MAX_ROWS; it is
+# cut back on open and every _EMBEDDING_DB_PRUNE_EVERY writes, so it never holds more than the sum
+_embedding_db_writes = 0
+_EMBEDDING_DB_PRUNE_EVERY = 256
+
+
+def _embedding_db_connection() -> Optional[sqlite3.Connection]:
+    """Connection to the persistent query embedding cache, opened on first use. None when
+    disabled or unavailable. Call with _embedding_db_lock held."""
+    global _embedding_db, _embedding_db_opened
+    if not _embedding_db_opened:
+        _embedding_db_opened = True
+        path = default_config.FAISS_QUERY_EMBEDDING_DB
+        if path:
+            try:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                conn = sqlite3.connect(path, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                columns = [row[1] for row in conn.execute("PRAGMA table_info(query_embeddings)")]
+                if columns and "last_used" not in columns:
+                    # written before rows were aged; it is only a cache
+                    conn.execute("DROP TABLE query_embeddings")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS query_embeddings ("
+                    "model TEXT NOT NULL, query_sha256 BLOB NOT NULL, embedding BLOB NOT NULL, "
+                    "last_used REAL NOT NULL, PRIMARY KEY (model, query_sha256))"
+                )
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS query_embeddings_last_used ON query_embeddings (last_used)"
+                )
+                _prune_embedding_db(conn)
+                conn.commit()
+                _embedding_db = conn
+            except (sqlite3.Error, OSError) as e:
+                logger.warning(f"FaissIndexer: query embedding cache disabled, cannot open {path}: {e}")
+    return _embedding_db
+
+
+def _prune_embedding_db(conn: sqlite3.Connection):
+    """Delete all but the FAISS_QUERY_EMBEDDING_DB_MAX_ROWS most recently used rows. Call with
+    _embedding_db_lock held; the caller commits."""
+    global _embedding_db_writes
+    _embedding_db_writes = 0
+    conn.execute(
+        "DELETE FROM query_embeddings WHERE rowid IN ("
+        "SELECT rowid FROM query_embeddings ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+        (default_config.FAISS_QUERY_EMBEDDING_DB_MAX_ROWS,),
+    )
+
+
+def _load_persisted_embedding(model: str, query: str) -> Optional[List[float]]:
+    with _embedding_db_lock:
+        conn = _embedding_db_connection()
+        if conn is None:
+            return None
+        key = (model, hashlib.sha256(query.encode("utf-8")).digest())
+        try:
+            row = conn.execute(
+                "SELECT embedding FROM query_embeddings WHERE model = ? AND query_sha256 = ?", key
+            ).fetchone()
+            if row:
+                conn.execute(
+                    "UPDATE query_embeddings SET last_used = ? WHERE model = ? AND query_sha256 = ?",
+                    (time.time(), *key),
+                )
+                conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"FaissIndexer: query embedding cache lookup failed: {e}")
+            return None
+    return np.frombuffer(row[0], dtype=np.float32).tolist() if row else None
+
+
+def _persist_embedding(model: str, query: str, embedding: List[float]):
+    global _embedding_db_writes
+    # Stored as float32, the precision the embedding model produces
+    blob = np.asarray(embedding, dtype=np.float32).tobytes()
+    with _embedding_db_lock:
+        conn = _embedding_db_connection()
+        if conn is None:
+            return
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO query_embeddings (model, query_sha256, embedding, last_used) "
+                "VALUES (?, ?, ?, ?)",
+                (model, hashlib.sha256(query.encode("utf-8")).digest(), blob, time.time()),
+            )
+            _embedding_db_writes += 1
+            if _embedding_db_writes >= _EMBEDDING_DB_PRUNE_EVERY:
+                _prune_embedding_db(conn)
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"FaissIndexer: query embedding cache write failed: {e}")
+
 
 class FaissWrapper:
     """
@@ -42,6 +162,8 @@ class FaissWrapper:
         )
         
         self.vector_store: Optional[FAISS] = None
+        # index file backing vector_store when it is memory-mapped (see warm)
+        self._mmap_path: Optional[str] = None
 
     def load_text_chunks(self, extraction_dir: str) -> List[Document]:
         """
@@ -118,6 +240,7 @@ class FaissWrapper:
                 self.embeddings, 
                 distance_strategy=self.distance_strategy
             )
+            self._quantize()
             
             logger.info(f"FaissIndexer: successfully created FAISS index")
             return True
@@ -126,6 +249,28 @@ class FaissWrapper:
             logger.error(f"FaissIndexer: failed to create index: {e}")
             return False
 
+    def _quantize(self):
+        """
+        Re-encode the freshly built flat index with the FAISS_QUANTIZATION scalar
+        quantizer. SQ8 stores one byte per dimension instead of four, so saved and
+        mapped indexes take a quarter of the memory and the memory-bound scan reads
+        less. "none" keeps float32 vectors.
+        """
+        quantization = default_config.FAISS_QUANTIZATION
+        if quantization == "none":
+            return
+        qtype = _SCALAR_QUANTIZERS.get(quantization)
+        if qtype is None:
+            logger.warning(f"FaissIndexer: unknown FAISS_QUANTIZATION {quantization!r}, keeping float32 vectors")
+            return
+        flat = self.vector_store.index
+        vectors = flat.reconstruct_n(0, flat.ntotal)
+        index = faiss.IndexScalarQuantizer(flat.d, qtype, flat.metric_type)
+        index.train(vectors)
+        index.add(vectors)
+        self.vector_store.index = index
+        logger.info(f"FaissIndexer: encoded {index.ntotal} vectors with {quantization}")
+
     def save_index(self, extraction_dir: str) -> bool:
         """
         Save the FAISS index to disk.
@@ -154,12 +299,40 @@ class FaissWrapper:
             logger.error(f"FaissIndexer: failed to save index: {e}")
             return False
 
-    def load_index(self, extraction_dir: str) -> bool:
+    def _load_store(self, index_dir: str, mmap: bool) -> FAISS:
+        """
+        Load a saved vector store. With `mmap`, the codes of flat and scalar-quantized
+        indexes are memory-mapped read-only (IO_FLAG_MMAP_IFC), so opening one does not
+        copy it into RAM; faiss reads other index types in full without raising.
+        """
+        self._mmap_path = None
+        if not mmap:
+            return FAISS.load_local(
+                index_dir,
+                self.embeddings,
+                allow_dangerous_deserialization=True  # Required for loading FAISS indexes
+            )
+        index_path = os.path.join(index_dir, f"{_INDEX_NAME}.faiss")
+        try:
+            index = faiss.read_index(index_path, faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY)
+            # codes the index does not own are the mapped file
+            if not getattr(getattr(faiss.downcast_index(index), "codes", None), "is_owned", True):
+                self._mmap_path = index_path
+        except RuntimeError as e:
+            logger.debug(f"FaissIndexer: cannot mmap {index_path} ({e}), reading it into memory")
+            index = faiss.read_index(index_path)
+        # Same docstore pickle FAISS.load_local reads
+        with open(os.path.join(index_dir, f"{_INDEX_NAME}.pkl"), "rb") as f:
+            docstore, index_to_docstore_id = pickle.load(f)
+        return FAISS(self.embeddings, index, docstore, index_to_docstore_id)
+
+    def load_index(self, extraction_dir: str, mmap: bool = True) -> bool:
         """
         Load an existing FAISS index from disk.
         
         Args:
             extraction_dir: Path to the extraction directory containing the saved index
+            mmap: Memory-map the index read-only when its type supports it
             
         Returns:
             True if index was loaded successfully, False otherwise
@@ -172,11 +345,7 @@ class FaissWrapper:
                 return False
             
             # Load the FAISS index with the same embeddings
-            self.vector_store = FAISS.load_local(
-                index_dir, 
-                self.embeddings, 
-                allow_dangerous_deserialization=True  # Required for loading FAISS indexes
-            )
+            self.vector_store = self._load_store(index_dir, mmap)
             
             logger.info(f"FaissIndexer: loaded index from {index_dir}")
             return True
@@ -185,6 +354,62 @@ class FaissWrapper:
             logger.error(f"FaissIndexer: failed to load index: {e}")
             return False
 
+    def close(self):
+        """
+        Release the loaded vector store. Dropping the last reference to the FAISS
+        index frees its memory, or unmaps it when it was loaded with `mmap`.
+        """
+        self.vector_store = None
+        self._mmap_path = None
+
+    @property
+    def mapped(self) -> bool:
+        """Whether the loaded index is memory-mapped rather than read into RAM."""
+        return self._mmap_path is not None
+
+    def warm(self):
+        """
+        Pull a memory-mapped index file into the page cache, so the first search
+        does not fault it in from disk page by page. Blocking; meant for a background
+        thread. No-op when the index was read into memory.
+
+        The file is read through sequentially: posix_fadvise/madvise(WILLNEED) left a
+        cold 200 MB flat index's first search at ~1.3 s, reading it took ~0.12 s and
+        brought that search down to ~20 ms.
+        """
+        path = self._mmap_path
+        if path is None:
+            return
+        try:
+            buf = bytearray(1 << 20)
+            with open(path, "rb", buffering=0) as f:
+                while f.readinto(buf):
+                    pass
+        except OSError as e:
+            logger.debug(f"FaissIndexer: cannot warm {path}: {e}")
+
+    def embed_query(self, query: str) -> List[float]:
+        """
+        Embed a search query. Embeddings of recent queries are cached in memory and
+        persisted on disk, so a repeated query skips the embedding model, also after a
+        restart; treat the returned list as read-only.
+        """
+        key = (self.embedding_model, query)
+        with _query_embeddings_lock:
+            embedding = _query_embeddings.get(key)
+            if embedding is not None:
+                _query_embeddings.move_to_end(key)
+                return embedding
+        embedding = _load_persisted_embedding(self.embedding_model, query)
+        if embedding is None:
+            embedding = self.embeddings.embed_query(query)
+            _persist_embedding(self.embedding_model, query, embedding)
+        with _query_embeddings_lock:
+            _query_embeddings[key] = embedding
+            while len(_query_embeddings) > default_config.FAISS_QUERY_EMBEDDING_CACHE_SIZE:
+                _query_embeddings.popitem(last=False)
+        return embedding
+
     def search(self, query: str, k: int | None = None) -> List[Tuple[Document, float]]:
         """
         Search the FAISS index for similar documents.
@@ -203,7 +428,7 @@ class FaissWrapper:
         search_k = k or self.search_k
         
         try:
-            results = self.vector_store.similarity_search_with_score(query, k=search_k)
+            results = self.vector_store.similarity_search_with_score_by_vector(self.embed_query(query), k=search_k)
             logger.info(f"FaissIndexer: found {len(results)} results for query")
             return results
             
@@ -211,6 +436,40 @@ class FaissWrapper:
             logger.error(f"FaissIndexer: search failed: {e}")
             return []
 
+    def search_columns(
+        self, query: str, k: int | None = None
+    ) -> Tuple[List[Dict[str, Any]], List[str], np.ndarray]:
+        """
+        Same search as `search`, returned column-wise instead of as (Document, score)
+        pairs, so callers building their own records skip the per-hit tuples.
+        
+        Args:
+            query: The search query string
+            k: Number of results to return (uses default from config if not specified)
+            
+        Returns:
+            (metadatas, texts, scores): per-hit metadata dicts and page contents, and a
+            float array of similarity scores, best first
+        """
+        if not self.vector_store:
+            logger.warning("FaissIndexer: no index loaded for search")
+            return [], [], np.empty(0)
+        
+        search_k = k or self.search_k
+        
+        try:
+            store = self.vector_store
+            vector = np.asarray([self.embed_query(query)], dtype=np.float32)
+            scores, ids = store.index.search(vector, search_k)
+            found = ids[0] != -1  # FAISS pads with -1 when the index has fewer than k vectors
+            docs = [store.docstore.search(store.index_to_docstore_id[i]) for i in ids[0][found].tolist()]
+            logger.info(f"FaissIndexer: found {len(docs)} results for query")
+            return [doc.metadata for doc in docs], [doc.page_content for doc in docs], scores[0][found]
+            
+        except Exception as e:
+            logger.error(f"FaissIndexer: search failed: {e}")
+            return [], [], np.empty(0)
+
     def index_extraction_directory(self, extraction_dir: str, force_rebuild: bool = False) -> bool:
         """
         Complete workflow: create and save FAISS index for an extraction directory.
@@ -330,6 +589,7 @@ class FaissWrapper:
                 self.embeddings, 
                 distance_strategy=self.distance_strategy
             )
+            self._quantize()
             
             logger.info(f"FaissIndexer: successfully created FAISS image captions index")
             return True
@@ -366,12 +626,13 @@ class FaissWrapper:
             logger.error(f"FaissIndexer: failed to save image captions index: {e}")
             return False
 
-    def load_image_captions_index(self, extraction_dir: str) -> bool:
+    def load_image_captions_index(self, extraction_dir: str, mmap: bool = True) -> bool:
         """
         Load an existing FAISS image captions index from disk.
         
         Args:
             extraction_dir: Path to the extraction directory containing the saved index
+            mmap: Memory-map the index read-only when its type supports it
             
         Returns:
             True if index was loaded successfully, False otherwise
@@ -384,11 +645,7 @@ class FaissWrapper:
                 return False
             
             # Load the FAISS index with the same embeddings
-            self.vector_store = FAISS.load_local(
-                index_dir, 
-                self.embeddings, 
-                allow_dangerous_deserialization=True  # Required for loading FAISS indexes
-            )
+            self.vector_store = self._load_store(index_dir, mmap)
             
             logger.info(f"FaissIndexer: loaded image captions index from {index_dir}")
             return True
@@ -14,6 +14,7 @@ class FigureImageCols:
     CAPTION = "caption"
     WIDTH = "width"
     HEIGHT = "height"
+    EXT = "ext"
 
     ALL: List[str] = [
         ID,
@@ -24,10 +25,11 @@ class FigureImageCols:
         CAPTION,
         WIDTH,
         HEIGHT,
+        EXT,
     ]
 
 
-@dataclass
+@dataclass(slots=True)
 class FigureImageMetadata:
     """
     Schema for a single bitmap image figure record.
@@ -43,6 +45,7 @@ class FigureImageMetadata:
     caption: str
     width: int
     height: int
+    ext: str = "png"  # file extension of the saved image (e.g. "png", "jpeg")
 
     def to_record(self) -> Dict[str, Any]:
         """Return a dict following the canonical column names."""
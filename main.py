@@ -1,19 +1,37 @@
 from analyzer.config import default_config
+from analyzer.faiss_wrapper import FaissWrapper
 from preprocessing.pdf_extraction import PdfExtractor
+from concurrent.futures import ProcessPoolExecutor
 import os
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def _run(file_path: str):
+    with PdfExtractor(file_path) as extractor:
+        extractor.extract_documents()
+
 def main():
     pdf_directory = default_config.PDF_DIR
 
-    for pdf_file in os.listdir(pdf_directory):
-        if pdf_file.endswith('.pdf'):
-            file_path = os.path.join(pdf_directory, pdf_file)
-            with PdfExtractor(file_path) as extractor:
-                extractor.extract_all()
+    with os.scandir(pdf_directory) as entries:
+        pdfs = [entry.path for entry in entries if entry.is_file() and entry.name.endswith('.pdf')]
+    if not pdfs:
+        logger.info(f"No PDF files found in {pdf_directory}")
+        return
+
+    # The MuPDF passes are CPU-bound and independent per PDF: one process per file
+    max_workers = default_config.EXTRACTION_MAX_WORKERS or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=min(len(pdfs), max_workers)) as executor:
+        list(executor.map(_run, pdfs))
+
+    # Embeddings run here, with one model shared by every PDF and index: the encoder
+    # is multithreaded already and a copy per worker process would multiply its memory
+    faiss_indexer = FaissWrapper()
+    for pdf in pdfs:
+        with PdfExtractor(pdf) as extractor:
+            extractor.extract_embeddings(faiss_indexer)
 
 if __name__ == "__main__":
     main()
@@ -1,18 +1,62 @@
 import pymupdf
 import os
+import re
 import logging
 import uuid
-from typing import Tuple
-import pandas as pd
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+import pyarrow as pa
+import pyarrow.parquet as pq
 from analyzer.config import default_config
 from analyzer.schemas import FigureImageCols as FIC, FigureImageMetadata
 from preprocessing.woosh_indexer import WooshIndexer
-from preprocessing.vector_figure_extractor import VectorFigureExtractor
+from preprocessing.vector_figure_extractor import FigureRegion, VectorFigureExtractor
 from preprocessing.chunker import TextChunker
 from analyzer.faiss_wrapper import FaissWrapper
 
 logger = logging.getLogger(__name__)
 
+# Embedded image formats written to disk unchanged (all accepted by the Anthropic Files API);
+# anything else is decoded and re-encoded as PNG.
+PASSTHROUGH_IMAGE_EXTS = ("png", "jpeg")
+
+# Caption keywords ("figure", "fig.", "fig", "table", "image", "photo", "chart", "diagram"),
+# matched case-insensitively at the start of a word in a single scan
+CAPTION_RE = re.compile(r"\b(?:figure|fig|table|image|photo|chart|diagram)", re.IGNORECASE)
+
+# Arrow column types for figures_metadata.parquet
+FIGURE_ARROW_TYPES = {
+    FIC.ID: pa.string(),
+    FIC.PAGE_INDEX: pa.int32(),
+    FIC.IMAGE_INDEX: pa.int32(),
+    FIC.IMAGE_PATH: pa.string(),
+    FIC.HAS_CAPTION: pa.bool_(),
+    FIC.CAPTION: pa.string(),
+    FIC.WIDTH: pa.int32(),
+    FIC.HEIGHT: pa.int32(),
+    FIC.EXT: pa.string(),
+}
+
+
+def _write_file(path: str, data: bytes) -> None:
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+@dataclass
+class _ImagePassState:
+    """State carried across pages while extracting bitmap images."""
+    pool: ThreadPoolExecutor
+    futures: List[Future] = field(default_factory=list)
+    # Image metadata for the parquet file, column by column
+    columns: Dict[str, list] = field(default_factory=lambda: {col: [] for col in FIC.ALL})
+    # xref -> (output_path, ext, width, height) of images already written to disk
+    saved_images: Dict[int, Tuple[str, str, int, int]] = field(default_factory=dict)
+    total_images: int = 0
+
+
 class PdfExtractor:
     def __init__(self, file_path: str):
         self.file_path = file_path
@@ -28,9 +72,10 @@ class PdfExtractor:
         logger.info(f"Initialized PdfExtractor for file: {self.file_name}")
         logger.debug(f"Output directory: {self.output_dir}")
 
-    def extract_image_caption(self, page: pymupdf.Page, image_rect: pymupdf.Rect) -> Tuple[bool, str]:
+    def extract_image_caption(self, words: List[tuple], image_rect: pymupdf.Rect) -> Tuple[bool, str]:
         """
         Search for caption text below (or above) an image.
+        `words` is the page's `page.get_text("words")` output, computed once per page.
         Returns (has_caption, caption_text)
         """
         # Define search zones
@@ -49,29 +94,28 @@ class PdfExtractor:
         )
         
         # Get words in both zones
-        all_words = page.get_text("words")
+        all_words = words
         if not isinstance(all_words, list):
             return False, ""
             
+        # Plain float overlap tests (same strict semantics as Rect.intersects)
+        # instead of building a pymupdf.Rect per word
+        bx0, by0, bx1, by1 = search_below.x0, search_below.y0, search_below.x1, search_below.y1
+        ax0, ay0, ax1, ay1 = search_above.x0, search_above.y0, search_above.x1, search_above.y1
         words_below = [w for w in all_words 
                        if isinstance(w, (list, tuple)) and len(w) >= 5 and 
-                       search_below.intersects(pymupdf.Rect(w[:4]))]
+                       w[0] < bx1 and bx0 < w[2] and w[1] < by1 and by0 < w[3]]
         words_above = [w for w in all_words 
                        if isinstance(w, (list, tuple)) and len(w) >= 5 and 
-                       search_above.intersects(pymupdf.Rect(w[:4]))]
+                       w[0] < ax1 and ax0 < w[2] and w[1] < ay1 and ay0 < w[3]]
         
         # Combine text
         text_below = " ".join(w[4] for w in words_below if len(w) > 4).strip()
         text_above = " ".join(w[4] for w in words_above if len(w) > 4).strip()
         
         # Check for caption keywords
-        caption_keywords = ("figure", "fig.", "fig", "table", "image", "photo", "chart", "diagram")
-        
-        text_below_lower = text_below.lower()
-        text_above_lower = text_above.lower()
-        
-        has_caption_below = any(kw in text_below_lower for kw in caption_keywords)
-        has_caption_above = any(kw in text_above_lower for kw in caption_keywords)
+        has_caption_below = CAPTION_RE.search(text_below) is not None
+        has_caption_above = CAPTION_RE.search(text_above) is not None
         
         if has_caption_below:
             return True, text_below
@@ -82,118 +126,240 @@ class PdfExtractor:
         
         return False, ""
 
+    @contextmanager
+    def _text_output(self):
+        """Open text.txt for writing; the file only appears once writing succeeded."""
+        # Write to a sibling temp file and swap it in, so readers never see a partial text.txt
+        tmp_path = self.text_path + ".tmp"
+        try:
+            with open(tmp_path, "wb", buffering=1 << 20) as out: # create a text output
+                yield out
+            os.replace(tmp_path, self.text_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _write_page_text(self, out, page: pymupdf.Page, textpage: Optional[pymupdf.TextPage] = None):
+        # get plain text (ensure str type for linters, then encode to UTF-8 bytes)
+        text = str(page.get_text(textpage=textpage)).encode("utf8")
+        out.write(text) # write text of page
+        out.write(bytes((12,))) # write page delimiter (form feed 0x0C)
+
     def extract_text(self):
         logger.info(f"Starting text extraction from {self.file_name}")
         doc = self.doc
-        out = open(self.text_path, "wb") # create a text output
         
         page_count = 0
-        for page in doc: # iterate the document pages
-            # get plain text (ensure str type for linters, then encode to UTF-8 bytes)
-            text = str(page.get_text()).encode("utf8")
-            out.write(text) # write text of page
-            out.write(bytes((12,))) # write page delimiter (form feed 0x0C)
-            page_count += 1
-            logger.info(f"Extracted text from page {page_count + 1} / {len(doc)}")
-        out.close()
+        with self._text_output() as out:
+            for page in doc: # iterate the document pages
+                self._write_page_text(out, page)
+                page_count += 1
+                logger.debug("Extracted text from page %d / %d", page_count, len(doc))
         
         logger.info(f"Text extraction complete: {page_count} pages extracted to {self.text_path}")
 
-    def extract_bitmap_images(self):
-        logger.info(f"Starting bitmap image extraction from {self.file_name}")
+    def _extract_page_images(
+        self,
+        page_index: int,
+        page: pymupdf.Page,
+        state: _ImagePassState,
+        words: Optional[List[tuple]] = None,
+    ):
+        """Save the bitmap images of one page and record their metadata in `state`.
+
+        `words` is the page's word list when the caller already has it; otherwise it is
+        parsed lazily, once per page, the first time a caption lookup needs it.
+        """
         doc = self.doc
+        image_list = page.get_images()
+        image_rects_by_xref: Dict[int, List[pymupdf.Rect]] = {}
+
+        logger.debug("Found %d images on page %d", len(image_list), page_index)
+
+        for image_index, img in enumerate(image_list, start=1): # enumerate the image list
+            xref = img[0] # get the XREF of the image
         
-        # Store image metadata for parquet file
-        image_data = []
+            # Get image bounding box on page (an xref may be listed more than once)
+            image_rects = image_rects_by_xref.get(xref)
+            if image_rects is None:
+                image_rects = page.get_image_rects(xref)
+                image_rects_by_xref[xref] = image_rects
         
-        total_images = 0
-        for page_index in range(len(doc)): # iterate over pdf pages
-            page = doc[page_index] # get the page
-            image_list = page.get_images()
-
-            # print the number of images found on the page
-            if image_list:
-                logger.debug(f"Found {len(image_list)} images on page {page_index}")
-                print(f"Found {len(image_list)} images on page {page_index}")
+            # Images shared across pages (logos, headers) are saved only once
+            saved = state.saved_images.get(xref)
+            if saved is not None:
+                output_path, ext, width, height = saved
             else:
-                logger.debug(f"No images found on page {page_index}")
-                print("No images found on page", page_index)
+                info = doc.extract_image(xref) if default_config.EXTRACTION_IMAGE_KEEP_ORIGINAL else None
+                if (
+                    info
+                    and info.get("ext") in PASSTHROUGH_IMAGE_EXTS
+                    and info.get("colorspace") != 4  # CMYK must be converted to RGB
+                    and not info.get("smask")  # soft mask needs the pixmap to merge alpha
+                ):
+                    # Write the embedded bytes as-is: no decode / PNG re-encode
+                    ext = info["ext"]
+                    width, height = info["width"], info["height"]
+                    filename = f"page_{page_index}_image_{image_index}.{ext}"
+                    output_path = os.path.join(self.images_dir, filename)
+                    state.futures.append(state.pool.submit(_write_file, output_path, info["image"]))
+                else:
+                    pix = pymupdf.Pixmap(doc, xref) # create a Pixmap
 
-            for image_index, img in enumerate(image_list, start=1): # enumerate the image list
-                xref = img[0] # get the XREF of the image
-                
-                # Get image bounding box on page
-                image_rects = page.get_image_rects(xref)
-                
-                pix = pymupdf.Pixmap(doc, xref) # create a Pixmap
+                    if pix.n - pix.alpha > 3: # CMYK: convert to RGB first
+                        logger.debug("Converting CMYK image to RGB on page %d", page_index)
+                        pix = pymupdf.Pixmap(pymupdf.csRGB, pix)
 
-                if pix.n - pix.alpha > 3: # CMYK: convert to RGB first
-                    logger.debug(f"Converting CMYK image to RGB on page {page_index}")
-                    pix = pymupdf.Pixmap(pymupdf.csRGB, pix)
+                    ext = "png"
+                    width, height = pix.width, pix.height
+                    filename = f"page_{page_index}_image_{image_index}.png"
+                    output_path = os.path.join(self.images_dir, filename)
+                    # encode here (MuPDF is not thread-safe), write on the pool
+                    state.futures.append(state.pool.submit(_write_file, output_path, pix.tobytes("png")))
+                    pix = None
+                info = None
+                state.saved_images[xref] = (output_path, ext, width, height)
+        
+            # Extract caption if image has bounding box
+            caption = ""
+            has_caption = False
+            if image_rects:
+                rect = image_rects[0]  # Use first occurrence
+                if words is None:
+                    words = page.get_text("words")
+                has_caption, caption = self.extract_image_caption(words, rect)
+                if has_caption:
+                    logger.debug("Found caption: %s", caption[:100])
+                elif caption:
+                    logger.debug("Found text near image: %s", caption[:50])
+        
+            # Store metadata (use canonical schema/columns)
+            record = FigureImageMetadata(
+                id=str(uuid.uuid4()),
+                page_index=page_index,
+                image_index=image_index,
+                image_path=output_path,
+                has_caption=has_caption,
+                caption=caption,
+                width=width,
+                height=height,
+                ext=ext,
+            )
+            for col in FIC.ALL:
+                state.columns[col].append(getattr(record, col))
+        
+            logger.debug("Saved image: %s", output_path)
+            state.total_images += 1
+            logger.debug("Extracted image %d on page %d", image_index, page_index)
 
-                filename = f"page_{page_index}_image_{image_index}.png"
-                os.makedirs(self.images_dir, exist_ok=True)
-                output_path = os.path.join(self.images_dir, filename)
-                pix.save(output_path) # save the image as png
-                
-                # Extract caption if image has bounding box
-                caption = ""
-                has_caption = False
-                if image_rects:
-                    rect = image_rects[0]  # Use first occurrence
-                    has_caption, caption = self.extract_image_caption(page, rect)
-                    if has_caption:
-                        logger.info(f"Found caption: {caption[:100]}")
-                    elif caption:
-                        logger.debug(f"Found text near image: {caption[:50]}")
-                
-                # Store metadata (use canonical schema/columns)
-                record = FigureImageMetadata(
-                    id=str(uuid.uuid4()),
-                    page_index=page_index,
-                    image_index=image_index,
-                    image_path=output_path,
-                    has_caption=has_caption,
-                    caption=caption,
-                    width=pix.width,
-                    height=pix.height,
-                )
-                image_data.append(record.to_record())
-                
-                logger.debug(f"Saved image: {output_path}")
-                pix = None
-                total_images += 1
-                logger.info(f"Extracted image {image_index} on page {page_index}")
+    def _finish_images(self, state: _ImagePassState):
+        for future in state.futures:
+            future.result()  # surface write errors
 
         # Save metadata to parquet file
-        if image_data:
-            df = pd.DataFrame(image_data)
-            df.to_parquet(self.parquet_path, index=False)
+        if state.total_images:
+            table = pa.table({
+                col: pa.array(values, type=FIGURE_ARROW_TYPES[col])
+                for col, values in state.columns.items()
+            })
+            # Dictionary-encode the highly repetitive columns (shared image paths, flags)
+            pq.write_table(
+                table,
+                self.parquet_path,
+                compression="zstd",
+                use_dictionary=[FIC.IMAGE_PATH, FIC.HAS_CAPTION, FIC.EXT],
+            )
             logger.info(f"Saved image metadata to {self.parquet_path}")
         
-        logger.info(f"Bitmap image extraction complete: {total_images} images extracted to {self.images_dir}")
+        logger.info(f"Bitmap image extraction complete: {state.total_images} images extracted to {self.images_dir}")
 
-    def extract_vector_graphics(self):
-        logger.info(f"Starting vector graphics extraction from {self.file_name}")
-        doc = self.doc
+    def extract_bitmap_images(self):
+        logger.info(f"Starting bitmap image extraction from {self.file_name}")
+        os.makedirs(self.images_dir, exist_ok=True)
+        # File writes run on a thread pool so disk I/O overlaps with MuPDF decoding
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+            state = _ImagePassState(pool=pool)
+            for page_index, page in enumerate(self.doc): # iterate over pdf pages
+                self._extract_page_images(page_index, page, state)
+            self._finish_images(state)
 
-        extractor = VectorFigureExtractor(
+    def _vector_figure_extractor(self) -> VectorFigureExtractor:
+        return VectorFigureExtractor(
             min_segments=40,          # relax if you miss sparse diagrams
             area_frac=0.008,          # 0.8% of page area minimum
             max_words_inside=14,
             caption_tokens=("figure", "fig.", "chart", "diagram", "schematic"),
+            png_compress_level=default_config.VECTOR_GRAPHICS_PNG_COMPRESS_LEVEL,
         )
 
+    def extract_vector_graphics(self):
+        logger.info(f"Starting vector graphics extraction from {self.file_name}")
+        doc = self.doc
+
+        extractor = self._vector_figure_extractor()
+
         figs = extractor.extract(
             doc=doc,
             doc_path=self.file_path,
-            dpi=300,
+            dpi=default_config.VECTOR_GRAPHICS_DPI,
+            large_dpi=default_config.VECTOR_GRAPHICS_LARGE_DPI,
             out_dir=self.vector_graphics_dir,
             save_png=True,
         )
         
         logger.info(f"Vector graphics extraction complete. {len(figs)} figures extracted to {self.vector_graphics_dir}")
 
+    def _visit_page(
+        self,
+        page_index: int,
+        page: pymupdf.Page,
+        text_out,
+        image_state: _ImagePassState,
+        vector_extractor: VectorFigureExtractor,
+        figures: List[FigureRegion],
+    ):
+        """Run the text, bitmap image and vector figure extraction for one page."""
+        # One text layer parse per page, shared by the plain text and the word boxes
+        textpage = page.get_textpage(flags=pymupdf.TEXTFLAGS_TEXT)
+        self._write_page_text(text_out, page, textpage)
+        words = page.get_text("words", textpage=textpage)
+
+        self._extract_page_images(page_index, page, image_state, words)
+
+        figures.extend(vector_extractor.extract_page(
+            page,
+            page_index,
+            doc_path=self.file_path,
+            dpi=default_config.VECTOR_GRAPHICS_DPI,
+            large_dpi=default_config.VECTOR_GRAPHICS_LARGE_DPI,
+            out_dir=self.vector_graphics_dir,
+            words=words,
+        ))
+        logger.debug("Processed page %d / %d", page_index + 1, len(self.doc))
+
+    def extract_pages(self):
+        """
+        Single pass over the document producing the same outputs as extract_text,
+        extract_bitmap_images and extract_vector_graphics, so each page is loaded
+        and its text layer parsed only once.
+        """
+        logger.info(f"Starting page extraction (text, images, vector graphics) from {self.file_name}")
+        os.makedirs(self.images_dir, exist_ok=True)
+        os.makedirs(self.vector_graphics_dir, exist_ok=True)
+
+        vector_extractor = self._vector_figure_extractor()
+        figures: List[FigureRegion] = []
+        with self._text_output() as text_out, ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+            image_state = _ImagePassState(pool=pool)
+            with vector_extractor.png_writer(pool):
+                for page_index, page in enumerate(self.doc):
+                    self._visit_page(page_index, page, text_out, image_state, vector_extractor, figures)
+            self._finish_images(image_state)
+
+        logger.info(f"Text extraction complete: {len(self.doc)} pages extracted to {self.text_path}")
+        logger.info(f"Vector graphics extraction complete. {len(figures)} figures extracted to {self.vector_graphics_dir}")
+
     def extract_text_chunks(self):
         logger.info(f"Starting text chunking for {self.file_name}")
         chunker = TextChunker()
@@ -210,11 +376,16 @@ class PdfExtractor:
         except Exception as e:
             logger.error(f"Failed to build Lucene index for {self.file_name}: {e}")
 
-    def extract_embeddings(self):
+    def extract_embeddings(self, faiss_indexer: Optional[FaissWrapper] = None):
+        """
+        Build the text and image caption FAISS indexes. Both are built with one wrapper,
+        so the embedding model is loaded once; pass `faiss_indexer` to share it across PDFs.
+        """
         logger.info(f"Starting FAISS embedding extraction from {self.file_name}")
         try:
             # Initialize FAISS indexer
-            faiss_indexer = FaissWrapper()
+            if faiss_indexer is None:
+                faiss_indexer = FaissWrapper()
             
             # Create and save FAISS index for this PDF's text chunks
             success = faiss_indexer.index_extraction_directory(self.output_dir)
@@ -230,7 +401,8 @@ class PdfExtractor:
             
             # Create and save FAISS index for image captions
             logger.info(f"Starting FAISS image captions index creation for {self.file_name}")
-            captions_indexer = FaissWrapper()
+            # The text index is saved already: reuse the wrapper (and its model) for captions
+            captions_indexer = faiss_indexer
             captions_success = captions_indexer.index_image_captions(self.output_dir)
             
             if captions_success:
@@ -247,13 +419,15 @@ class PdfExtractor:
         
         logger.info(f"FAISS embedding extraction complete for {self.file_name}")
 
-    def extract_all(self):
-        self.extract_text()
-        self.extract_bitmap_images()
-        self.extract_vector_graphics()
+    def extract_documents(self):
+        """CPU-bound MuPDF passes: pages, text chunks and the Lucene-style index."""
+        self.extract_pages()
         self.extract_text_chunks()
         # Build Lucene-style index for this PDF's extracted artifacts
         self.extract_lucene_index()
+
+    def extract_all(self):
+        self.extract_documents()
         # Build FAISS vector embeddings index for semantic search
         self.extract_embeddings()
 
@@ -1,16 +1,67 @@
 from __future__ import annotations
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
 from dataclasses import dataclass
 from typing import List, Tuple, Optional, Iterable, Dict, Any
 import os
 import pathlib
+import re
+import struct
+import zlib
 
+import numpy as np
 import pymupdf  # PyMuPDF
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+def _write_png(path: str, data: bytes) -> None:
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def _png_chunk(tag: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+
+def _extract_page_range(
+    extractor: "VectorFigureExtractor", pdf_path: str, doc_path: str, pages: List[int], **kwargs
+) -> List[FigureRegion]:
+    """Worker for extract(workers > 1): MuPDF documents cannot be shared, so each process opens its own."""
+    with pymupdf.open(pdf_path) as doc:
+        return extractor.extract(doc, doc_path, pages=pages, **kwargs)
+
+
+# (colorant count, alpha) -> PNG colour type. Opaque pixmaps only: MuPDF stores alpha
+# premultiplied and PNG expects it straight, so alpha pixmaps use MuPDF's own encoder
+_PNG_COLOR_TYPES = {(1, False): 0, (3, False): 2}
+
+
+def _encode_png(pix: pymupdf.Pixmap, compress_level: Optional[int]) -> bytes:
+    """
+    PNG bytes of `pix`. MuPDF's encoder has no compression setting, so when
+    `compress_level` is given the rows are deflated here with zlib at that level
+    (same pixels and pHYs resolution as pix.tobytes("png"), unfiltered scanlines).
+    """
+    color_type = _PNG_COLOR_TYPES.get((pix.n - pix.alpha, bool(pix.alpha)))
+    if compress_level is None or color_type is None:
+        return pix.tobytes("png")
+    width, height, row_bytes = pix.width, pix.height, pix.width * pix.n
+    rows = np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape(height, pix.stride)
+    raw = np.zeros((height, row_bytes + 1), dtype=np.uint8)  # column 0: filter type None
+    raw[:, 1:] = rows[:, :row_bytes]
+    ppm_x, ppm_y = round(pix.xres / 0.0254), round(pix.yres / 0.0254)
+    return b"".join((
+        b"\x89PNG\r\n\x1a\n",
+        _png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0)),
+        _png_chunk(b"pHYs", struct.pack(">IIB", ppm_x, ppm_y, 1)),
+        _png_chunk(b"IDAT", zlib.compress(raw, compress_level)),  # deflates the array buffer in place, no copy
+        _png_chunk(b"IEND", b""),
+    ))
+
+
+@dataclass(slots=True)
 class FigureRegion:
     doc_path: str
     page_index: int
@@ -23,6 +74,125 @@ class FigureRegion:
     png_path: Optional[str] = None
     dpi: Optional[int] = None
 
+    @staticmethod
+    def to_columns(regions: List["FigureRegion"]) -> Dict[str, np.ndarray]:
+        """
+        Structure-of-arrays view of `regions` for vectorized filtering/sorting:
+        parallel arrays "page_index", "score", "n_words_inside", "has_caption"
+        and "rects" ((N, 4) x0, y0, x1, y1), row k describing regions[k].
+        """
+        n = len(regions)
+        return {
+            "page_index": np.fromiter((fr.page_index for fr in regions), dtype=np.int64, count=n),
+            "score": np.fromiter((fr.score for fr in regions), dtype=np.float64, count=n),
+            "n_words_inside": np.fromiter((fr.n_words_inside for fr in regions), dtype=np.int64, count=n),
+            "has_caption": np.fromiter((fr.has_caption for fr in regions), dtype=bool, count=n),
+            "rects": np.array([tuple(fr.rect) for fr in regions], dtype=np.float64).reshape(n, 4),
+        }
+
+
+# Above this many boxes _overlap_pairs sweeps along x instead of building (N, N) matrices
+_DENSE_OVERLAP_MAX = 1024
+
+
+def _overlap_pairs(boxes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Index pairs (i, j), i != j, of the (N, 4) boxes that overlap with positive area."""
+    x0, y0, x1, y1 = boxes.T
+    if len(boxes) <= _DENSE_OVERLAP_MAX:
+        inter_w = np.minimum(x1[:, None], x1[None, :]) - np.maximum(x0[:, None], x0[None, :])
+        i, j = np.nonzero(np.triu(inter_w > 0, k=1))
+        # boxes apart on x cannot intersect: only the pairs left get the y test
+        inter_h = np.minimum(y1[i], y1[j]) - np.maximum(y0[i], y0[j])
+        keep = inter_h > 0
+        return i[keep], j[keep]
+
+    # sort by x0: a box can only overlap the later boxes that start before its x1
+    order = np.argsort(x0, kind="stable")
+    ends = np.searchsorted(x0[order], x1[order], side="left")
+    pairs_i: List[np.ndarray] = []
+    pairs_j: List[np.ndarray] = []
+    for k, a in enumerate(order.tolist()):
+        cand = order[k + 1:ends[k]]
+        if len(cand) == 0:
+            continue
+        inter_w = np.minimum(x1[a], x1[cand]) - np.maximum(x0[a], x0[cand])
+        inter_h = np.minimum(y1[a], y1[cand]) - np.maximum(y0[a], y0[cand])
+        hit = cand[(inter_w > 0) & (inter_h > 0)]
+        pairs_i.append(np.full(len(hit), a))
+        pairs_j.append(hit)
+    if not pairs_i:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+    return np.concatenate(pairs_i), np.concatenate(pairs_j)
+
+
+def _connected_components(n: int, i: np.ndarray, j: np.ndarray) -> np.ndarray:
+    """
+    Union-find over the edges (i[k], j[k]) of an n-node graph.
+    Returns a component label per node, numbered 0.. in order of each component's first node.
+    """
+    parent = list(range(n))
+
+    def find(a: int) -> int:
+        root = a
+        while parent[root] != root:
+            root = parent[root]
+        while parent[a] != root:  # path compression
+            parent[a], a = root, parent[a]
+        return root
+
+    for a, b in zip(i.tolist(), j.tolist()):
+        ra, rb = find(a), find(b)
+        if ra != rb:
+            # keep the smaller index as root so labels follow first occurrence
+            if ra < rb:
+                parent[rb] = ra
+            else:
+                parent[ra] = rb
+
+    labels = np.empty(n, dtype=np.int64)
+    remap: Dict[int, int] = {}
+    for a in range(n):
+        labels[a] = remap.setdefault(find(a), len(remap))
+    return labels
+
+
+@dataclass
+class _PageWords:
+    """A page's word table, parsed once and shared by every candidate on the page."""
+    # (x0,y0,x1,y1,"word", block_no, line_no, word_no)
+    words: List[Tuple[float, float, float, float, str, int, int, int]]
+    # (N, 4) word bboxes as x0, y0, x1, y1 (float64 so comparisons match pymupdf's double math)
+    boxes: np.ndarray
+    texts: List[str]
+    # spatial index: word indices sorted by y0, the sorted y0 values and the tallest word
+    order: np.ndarray
+    y0_sorted: np.ndarray
+    max_h: float
+
+    @classmethod
+    def from_words(cls, words: List[Tuple]) -> "_PageWords":
+        boxes = np.array([w[:4] for w in words], dtype=np.float64).reshape(-1, 4)
+        order = np.argsort(boxes[:, 1], kind="stable")
+        max_h = float(np.max(boxes[:, 3] - boxes[:, 1], initial=0.0))
+        return cls(
+            words=words,
+            boxes=boxes,
+            texts=[w[4] for w in words],
+            order=order,
+            y0_sorted=boxes[order, 1],
+            max_h=max_h,
+        )
+
+    def candidates(self, y0: float, y1: float) -> np.ndarray:
+        """
+        Indices (in reading order) of the words whose vertical extent can overlap
+        the open band (y0, y1). A word can only reach into the band if its own y0
+        lies in (y0 - max_h, y1), which is a binary search on the sorted y0s.
+        """
+        lo = np.searchsorted(self.y0_sorted, y0 - self.max_h, side="right")
+        hi = np.searchsorted(self.y0_sorted, y1, side="left")
+        return np.sort(self.order[lo:hi])
+
 
 class VectorFigureExtractor:
     """
@@ -39,6 +209,8 @@ class VectorFigureExtractor:
     """
 
     CAPTION_TOKENS_DEFAULT = ("figure", "fig.", "chart", "diagram", "schematic")
+    # drawing ops that count as shape segments: line/curve/rect/quad/shade/fill/stroke
+    VALID_OPS = frozenset(("l", "c", "re", "qu", "sh", "f", "s"))
 
     def __init__(
         self,
@@ -51,6 +223,7 @@ class VectorFigureExtractor:
         caption_search_px: int = 220,       # how far below box to search for caption
         merge_iou_thresh: float = 0.2,
         pad_px: int = 6,
+        png_compress_level: Optional[int] = None,  # zlib level 0-9; None keeps MuPDF's encoder
     ):
         self.min_segments = min_segments
         self.min_area = min_area
@@ -58,9 +231,17 @@ class VectorFigureExtractor:
         self.area_frac = area_frac
         self.max_words_inside = max_words_inside
         self.caption_tokens = tuple(t.lower() for t in caption_tokens)
+        # all tokens in one case-insensitive scan; "(?!)" never matches, like any() over no tokens
+        self._caption_re = re.compile(
+            "|".join(re.escape(t) for t in self.caption_tokens) or "(?!)", re.IGNORECASE
+        )
         self.caption_search_px = caption_search_px
         self.merge_iou_thresh = merge_iou_thresh
         self.pad_px = pad_px
+        self.png_compress_level = png_compress_level
+        # set while inside png_writer(): PNG file writes go to this pool
+        self._png_pool: Optional[ThreadPoolExecutor] = None
+        self._png_futures: List[Future] = []
 
     # ---------- public API ----------
 
@@ -73,10 +254,18 @@ class VectorFigureExtractor:
         save_png: bool = True,
         pages: Optional[Iterable[int]] = None,
         close: bool = False,
+        large_dpi: Optional[int] = None,
+        large_area_frac: float = 0.5,
+        workers: int = 1,
     ) -> List[FigureRegion]:
         """
         Process the PDF and return metadata for detected figures.
         Optionally saves cropped PNGs to `out_dir` (defaults to <pdfstem>_figures).
+        Figures covering more than `large_area_frac` of the page are rendered at
+        `large_dpi` when given, the rest at `dpi`.
+        With `workers` > 1 and a document opened from a file, contiguous page
+        ranges are processed in that many worker processes (MuPDF is not
+        thread-safe, so pages cannot share one handle across threads).
 
         Returns a flat list of FigureRegion.
         """
@@ -90,155 +279,270 @@ class VectorFigureExtractor:
             os.makedirs(out_dir, exist_ok=True)
 
         results: List[FigureRegion] = []
-        for pidx in pages:
-            logger.info(f"Processing page {pidx + 1} / {len(doc)} for vector figures")
-            page = doc[pidx]
-            boxes_scored = self._figure_boxes_scored(page)
-            if not boxes_scored:
-                continue
-
-            for rect, score, n_words, has_cap, cap_text in boxes_scored:
-                # rasterize
-                clip = self._pad(rect, self.pad_px)
-                pix = page.get_pixmap(clip=clip, dpi=dpi, alpha=False)
-                png_path = None
-                if save_png and out_dir is not None:
-                    png_path = os.path.join(out_dir, f"p{pidx:04d}_y{int(rect.y0)}_x{int(rect.x0)}.png")
-                    pix.save(png_path)
-
-                results.append(
-                    FigureRegion(
+        if workers > 1 and len(pages) > 1 and doc.name and os.path.isfile(doc.name):
+            results = self._extract_in_processes(
+                doc.name, doc_path, pages, workers,
+                dpi=dpi, out_dir=out_dir, save_png=save_png,
+                large_dpi=large_dpi, large_area_frac=large_area_frac,
+            )
+        else:
+            with self.png_writer():
+                for pidx in pages:
+                    logger.debug("Processing page %d / %d for vector figures", pidx + 1, len(doc))
+                    results.extend(self.extract_page(
+                        doc[pidx],
+                        pidx,
                         doc_path=doc_path,
-                        page_index=pidx,
-                        rect=pymupdf.Rect(rect),
-                        score=score,
-                        n_words_inside=n_words,
-                        has_caption=has_cap,
-                        caption_text=cap_text,
-                        png_path=png_path,
                         dpi=dpi,
-                    )
-                )
+                        out_dir=out_dir if save_png else None,
+                        large_dpi=large_dpi,
+                        large_area_frac=large_area_frac,
+                    ))
 
         if close:
             doc.close()
-        # sort by page then by score desc
-        results.sort(key=lambda fr: (fr.page_index, -fr.score))
+        # sort by page then by score desc (lexsort is stable, like list.sort)
+        cols = FigureRegion.to_columns(results)
+        order = np.lexsort((-cols["score"], cols["page_index"]))
+        return [results[k] for k in order.tolist()]
+
+    def extract_page(
+        self,
+        page: pymupdf.Page,
+        pidx: int,
+        doc_path: str,
+        dpi: int = 300,
+        out_dir: Optional[str] = None,
+        large_dpi: Optional[int] = None,
+        large_area_frac: float = 0.5,
+        words: Optional[List[Tuple]] = None,
+    ) -> List[FigureRegion]:
+        """
+        Detect and rasterize the figures of a single page, for callers that drive
+        their own page loop. PNGs are saved to `out_dir` when given; the directory
+        must already exist. Pass the page's `get_text("words")` output as `words`
+        when it is already at hand to skip re-parsing the text layer.
+
+        Returns the page's FigureRegions sorted by score desc.
+        """
+        boxes_scored = self._figure_boxes_scored(page, words)
+        if not boxes_scored:
+            return []
+        large_area = large_area_frac * page.rect.width * page.rect.height
+        # joined once per page; each figure only appends its position
+        png_prefix = os.path.join(out_dir, f"p{pidx:04d}_") if out_dir is not None else None
+
+        results: List[FigureRegion] = []
+        for rect, score, n_words, has_cap, cap_text in boxes_scored:
+            # rasterize
+            fig_dpi = dpi
+            if large_dpi is not None and rect.width * rect.height > large_area:
+                fig_dpi = large_dpi
+            clip = self._pad(rect, self.pad_px)
+            pix = page.get_pixmap(clip=clip, dpi=fig_dpi, alpha=False)
+            png_path = None
+            if png_prefix is not None:
+                png_path = f"{png_prefix}y{int(rect.y0)}_x{int(rect.x0)}.png"
+                self._save_png(pix, png_path)
+
+            results.append(
+                FigureRegion(
+                    doc_path=doc_path,
+                    page_index=pidx,
+                    rect=pymupdf.Rect(rect),
+                    score=score,
+                    n_words_inside=n_words,
+                    has_caption=has_cap,
+                    caption_text=cap_text,
+                    png_path=png_path,
+                    dpi=fig_dpi,
+                )
+            )
         return results
 
+    def _extract_in_processes(
+        self, pdf_path: str, doc_path: str, pages: List[int], workers: int, **kwargs
+    ) -> List[FigureRegion]:
+        n_ranges = min(workers, len(pages))
+        page_ranges = [r.tolist() for r in np.array_split(pages, n_ranges)]
+        results: List[FigureRegion] = []
+        with ProcessPoolExecutor(max_workers=n_ranges) as pool:
+            futures = [
+                pool.submit(_extract_page_range, self, pdf_path, doc_path, page_range, **kwargs)
+                for page_range in page_ranges
+            ]
+            for future in futures:
+                results.extend(future.result())
+        return results
+
+    @contextmanager
+    def png_writer(self, pool: Optional[ThreadPoolExecutor] = None):
+        """
+        Within the block, extract/extract_page encode PNGs on the calling thread
+        (MuPDF is not thread-safe) and hand the file writes to a thread pool, so
+        disk I/O overlaps with rendering the next figures. Uses `pool` when given,
+        otherwise a private one. All writes have finished when the block exits.
+        """
+        if self._png_pool is not None:
+            # nested block: the outer one owns the pool and waits for the writes
+            yield
+            return
+        own_pool = pool is None
+        if own_pool:
+            pool = ThreadPoolExecutor(max_workers=os.cpu_count())
+        self._png_pool, self._png_futures = pool, []
+        try:
+            yield
+            for future in self._png_futures:
+                future.result()
+        finally:
+            self._png_pool, self._png_futures = None, []
+            if own_pool:
+                pool.shutdown(wait=True)
+
     # ---------- internals ----------
 
+    def _save_png(self, pix: pymupdf.Pixmap, png_path: str) -> None:
+        data = _encode_png(pix, self.png_compress_level)
+        if self._png_pool is None:
+            _write_png(png_path, data)
+            return
+        self._png_futures.append(self._png_pool.submit(_write_png, png_path, data))
+
     def _pad(self, rect: pymupdf.Rect, px: int) -> pymupdf.Rect:
         return pymupdf.Rect(rect.x0 - px, rect.y0 - px, rect.x1 + px, rect.y1 + px)
 
-    def _page_words(self, page: pymupdf.Page) -> List[Tuple[float, float, float, float, str, int, int, int]]:
-        # (x0,y0,x1,y1,"word", block_no, line_no, word_no)
-        words = page.get_text("words")
+    def _page_words(self, page: pymupdf.Page, words: Optional[List[Tuple]] = None) -> _PageWords:
+        if words is None:
+            words = page.get_text("words")
         # Type check: ensure it's a list
-        if isinstance(words, list):
-            return words  # type: ignore
-        return []
-
-    def _words_in_rect(self, page: pymupdf.Page, rect: pymupdf.Rect):
-        return [w for w in self._page_words(page) if rect.intersects(pymupdf.Rect(w[:4]))]
-
-    def _caption_below(self, page: pymupdf.Page, rect: pymupdf.Rect) -> Tuple[bool, str]:
-        zone = pymupdf.Rect(rect.x0, rect.y1, rect.x1, rect.y1 + self.caption_search_px)
-        words = [t for t in self._page_words(page) if zone.intersects(pymupdf.Rect(t[:4]))]
-        text = " ".join(t[4] for t in words).strip()
-        low = text.lower()
-        has = any(tok in low for tok in self.caption_tokens)
-        return has, text
-
-    def _vector_candidates(self, page: pymupdf.Page) -> List[pymupdf.Rect]:
-        # collect drawing groups and filter by complexity, area, and stroke width
-        rects: List[pymupdf.Rect] = []
-        page_area = page.rect.width * page.rect.height
+        if not isinstance(words, list):
+            words = []
+        return _PageWords.from_words(words)
+
+    @staticmethod
+    def _intersects(boxes: np.ndarray, rect: np.ndarray) -> np.ndarray:
+        """
+        Bool mask over `boxes`: rect intersects boxes[n], with the same strict
+        semantics as pymupdf.Rect.intersects (empty boxes never intersect).
+        """
+        bx0, by0, bx1, by1 = boxes.T
+        rx0, ry0, rx1, ry1 = rect
+        non_empty = (bx0 < bx1) & (by0 < by1)
+        return non_empty & (rx0 < bx1) & (bx0 < rx1) & (ry0 < by1) & (by0 < ry1)
+
+    def _words_and_captions(
+        self, page_words: _PageWords, rects: np.ndarray
+    ) -> List[Tuple[int, bool, str]]:
+        """
+        For each rect: (number of words inside, has_caption, caption_text), where
+        the caption is the text of the words in the zone `caption_search_px` below it.
+        One pass per rect: the words of the band spanning rect and caption zone are
+        fetched once and tested against both.
+        """
+        boxes, texts = page_words.boxes, page_words.texts
+        out: List[Tuple[int, bool, str]] = []
+        for rect in rects:
+            zone = (rect[0], rect[3], rect[2], rect[3] + self.caption_search_px)
+            idx = page_words.candidates(rect[1], zone[3])
+            band = boxes[idx]
+            n_inside = int(np.count_nonzero(self._intersects(band, rect)))
+            cap_idx = idx[self._intersects(band, zone)]
+            text = " ".join(texts[i] for i in cap_idx.tolist()).strip()
+            has = self._caption_re.search(text) is not None
+            out.append((n_inside, has, text))
+        return out
+
+    def _vector_candidates(self, page: pymupdf.Page) -> np.ndarray:
+        """(N, 4) x0, y0, x1, y1 boxes of the drawing groups passing the complexity, area and stroke filters."""
+        rects: List[Tuple[float, float, float, float]] = []
+        page_rect = page.rect
+        page_area = page_rect.width * page_rect.height
         min_area = self.min_area if self.min_area is not None else self.area_frac * page_area
+        # thresholds read once per page, not once per drawing group / item
+        min_segments, min_stroke, valid_ops = self.min_segments, self.min_stroke, self.VALID_OPS
 
         for d in page.get_drawings():
-            rect = pymupdf.Rect(d["rect"])
-            area = rect.width * rect.height
+            # area from plain coordinates (clamped like Rect.width/height)
+            x0, y0, x1, y1 = d["rect"]
+            area = max(0.0, x1 - x0) * max(0.0, y1 - y0)
             if area < min_area:
                 continue
 
-            items = d.get("items", [])
-            # count segments that suggest shapes (lines/curves/rect/fill/stroke)
+            # one pass: count segments that suggest shapes and keep a running stroke width sum
             segs = 0
-            widths = []
-            for it in items:
-                op = it[0] if len(it) > 0 else None
-                if op in ("l", "c", "re", "qu", "sh", "f", "s"):  # line/curve/rect/quad/shade/fill/stroke
+            w_sum = 0.0
+            w_n = 0
+            for it in d.get("items", ()):
+                if not it:
+                    continue
+                if it[0] in valid_ops:
                     segs += 1
                 # try to read stroke width when present
                 if len(it) > 1 and isinstance(it[1], dict):
                     w = it[1].get("width", None)
                     if w is not None:
-                        widths.append(w)
-
-            avg_stroke = (sum(widths) / len(widths)) if widths else 0.0
-            if segs >= self.min_segments and avg_stroke >= self.min_stroke:
-                rects.append(rect)
-        return rects
-
-    def _merge_boxes(self, rects: List[pymupdf.Rect]) -> List[pymupdf.Rect]:
-        if not rects:
-            return []
-        rects = [pymupdf.Rect(r) for r in rects]
-        changed = True
-        while changed:
-            changed = False
-            out: List[pymupdf.Rect] = []
-            used = [False] * len(rects)
-            for i, r in enumerate(rects):
-                if used[i]:
-                    continue
-                curr = r
-                for j in range(i + 1, len(rects)):
-                    if used[j]:
-                        continue
-                    s = rects[j]
-                    inter = curr & s
-                    inter_area = inter.width * inter.height
-                    if inter_area == 0:
-                        continue
-                    union = curr | s
-                    union_area = union.width * union.height
-                    iou = inter_area / union_area if union_area > 0 else 0
-                    if iou >= self.merge_iou_thresh or curr.intersects(s):
-                        curr = curr | s
-                        used[j] = True
-                        changed = True
-                used[i] = True
-                out.append(curr)
-            rects = out
-        return rects
-
-    def _score_candidate(self, page: pymupdf.Page, rect: pymupdf.Rect) -> Tuple[float, int, bool, str]:
-        words = self._words_in_rect(page, rect)
-        n_inside = len(words)
-        has_cap, cap_text = self._caption_below(page, rect)
-
+                        w_sum += w
+                        w_n += 1
+
+            avg_stroke = (w_sum / w_n) if w_n else 0.0
+            if segs >= min_segments and avg_stroke >= min_stroke:
+                rects.append((x0, y0, x1, y1))
+        return np.array(rects, dtype=np.float64).reshape(-1, 4)
+
+    def _merge_boxes(self, boxes: np.ndarray) -> np.ndarray:
+        """Merge overlapping (N, 4) boxes into the bounding boxes of their groups."""
+        # Merged boxes grow and can start overlapping boxes none of their members
+        # touched, so repeat the component pass until nothing overlaps any more.
+        while len(boxes) > 1:
+            x0, y0, x1, y1 = boxes.T
+            # Any positive-area overlap merges a pair; IoU >= merge_iou_thresh implies
+            # one, so this single test covers both conditions of the pairwise rule.
+            i, j = _overlap_pairs(boxes)
+            if len(i) == 0:
+                break
+            groups = _connected_components(len(boxes), i, j)
+            n_groups = int(groups.max()) + 1
+            merged = np.empty((n_groups, 4), dtype=np.float64)
+            merged[:, :2] = np.inf
+            merged[:, 2:] = -np.inf
+            np.minimum.at(merged[:, 0], groups, x0)
+            np.minimum.at(merged[:, 1], groups, y0)
+            np.maximum.at(merged[:, 2], groups, x1)
+            np.maximum.at(merged[:, 3], groups, y1)
+            boxes = merged
+        return boxes
+
+    def _score_candidate(self, area: float, page_area: float, n_inside: int, has_cap: bool) -> float:
         # scoring: reward caption cue, reward fewer internal words
         score = (1000.0 if has_cap else 0.0) + max(0.0, 50.0 - float(n_inside))
         # small bonus for reasonably "large" figures (but not full-page)
-        page_area = page.rect.width * page.rect.height
-        area = rect.width * rect.height
         score += min(100.0, 100.0 * (area / page_area))
 
-        return score, n_inside, has_cap, cap_text
+        return score
 
     def _figure_boxes_scored(
-        self, page: pymupdf.Page
+        self, page: pymupdf.Page, words: Optional[List[Tuple]] = None
     ) -> List[Tuple[pymupdf.Rect, float, int, bool, str]]:
-        raw = self._vector_candidates(page)
-        merged = self._merge_boxes(raw)
+        # candidates stay (N, 4) arrays until here; Rects are only built for the returned boxes
+        rects = self._merge_boxes(self._vector_candidates(page))
+        if len(rects) == 0:
+            return []
+        # parse the text layer once per page, not once per candidate
+        page_words = self._page_words(page, words)
+        # word/caption tests only look at the words in each candidate's vertical band
+        # areas computed once (same clamping as Rect.width/height), page area once per page
+        areas = (np.maximum(rects[:, 2] - rects[:, 0], 0) * np.maximum(rects[:, 3] - rects[:, 1], 0)).tolist()
+        page_rect = page.rect
+        page_area = page_rect.width * page_rect.height
         scored: List[Tuple[pymupdf.Rect, float, int, bool, str]] = []
-        for r in merged:
-            score, n_words, has_cap, cap_text = self._score_candidate(page, r)
+        for r, area, (n_words, has_cap, cap_text) in zip(
+            rects.tolist(), areas, self._words_and_captions(page_words, rects)
+        ):
+            score = self._score_candidate(area, page_area, n_words, has_cap)
             if has_cap or n_words <= self.max_words_inside:
-                scored.append((r, score, n_words, has_cap, cap_text))
-        # sort by score desc
-        scored.sort(key=lambda x: x[1], reverse=True)
-        return scored
+                scored.append((pymupdf.Rect(r), score, n_words, has_cap, cap_text))
+        # sort by score desc, ties kept in candidate order
+        scores = np.fromiter((x[1] for x in scored), dtype=np.float64, count=len(scored))
+        return [scored[k] for k in np.argsort(-scores, kind="stable").tolist()]
 
@@ -10,6 +10,7 @@ if PROJECT_ROOT not in sys.path:
 import sys
 from typing import List
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from langchain_core.messages import HumanMessage, ToolMessage
 
 from agents.agent import make_document_agent
@@ -118,13 +119,16 @@ def main():
     document_name = args.document
     verbose = args.verbose
 
-    # Initialize document session
-    default_registry.ensure(document_name)
-    default_registry.set_active(document_name)
+    # Initialize document session in the background while the agent is created;
+    # loading the indices and embedding model is the slowest part of startup
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        session_future = executor.submit(default_registry.ensure, document_name)
 
-    # Create agent
-    print("\n🚀 Initializing agent...")
-    agent = make_document_agent()
+        # Create agent
+        print("\n🚀 Initializing agent...")
+        agent = make_document_agent()
+        session_future.result()
+    default_registry.set_active(document_name)
     print("✅ Agent ready!")
 
     # Start chat loop
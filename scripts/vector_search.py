@@ -114,15 +114,19 @@ def main(argv: Optional[list[str]] = None) -> int:
 		# Show document content preview (always show some content from the document)
 		content = document.page_content.strip()
 		if content:
+			# Flatten newlines once, only over the longest prefix either preview needs
+			# (replace keeps the length, so slicing first gives the same previews)
+			flat = content[:max(100, args.max_chars if args.show_text else 0)].replace("\n", " ")
+
 			# Always show a short preview
-			short_preview = content.replace("\n", " ")[:100]
+			short_preview = flat[:100]
 			if len(content) > 100:
 				short_preview += "..."
 			print(f"    content100: {short_preview}")
 			
 			# Show longer preview if requested
 			if args.show_text:
-				long_preview = content.replace("\n", " ")[:args.max_chars]
+				long_preview = flat[:args.max_chars]
 				if len(content) > args.max_chars:
 					long_preview += "..."
 				print(f"    preview:    {long_preview}")
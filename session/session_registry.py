@@ -26,70 +26,439 @@ Implementation details:
 """
 
 import os
+import heapq
 import logging
-from typing import Dict, Any, List, Optional
-from dataclasses import dataclass
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from functools import lru_cache
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Callable, Dict, Any, Hashable, Iterator, List, Mapping, Optional, Tuple
+from dataclasses import dataclass, field
 
-import pandas as pd
-import anthropic
+import numpy as np
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
 
 from analyzer.config import default_config
-from analyzer.woosh_searcher import WooshSearcher
-from analyzer.faiss_wrapper import FaissWrapper
 from analyzer.schemas import DocumentTypes
 from analyzer.anthropic_cache import AnthropicFileCache
 
+if TYPE_CHECKING:
+    # Imported where first used instead: FAISS/LangChain/embedding models, Whoosh and the
+    # Anthropic SDK are heavy, and a process may never open a document or upload an image
+    import anthropic
+    from analyzer.faiss_wrapper import FaissWrapper
+    from analyzer.woosh_searcher import WooshSearcher
+
 logger = logging.getLogger(__name__)
 
+# Extraction layout, read once: settings are fixed when analyzer.config is imported
+_EXTRACTION_DIR = default_config.EXTRACTION_DIR
+_CHUNK_DIR = default_config.EXTRACTION_CHUNK_DIR
+_FIGURES_PARQUET_FILE = default_config.EXTRACTION_FIGURES_PARQUET_FILE
+_LUCENE_INDEX_DIR = default_config.EXTRACTION_LUCENE_INDEX_DIR
+
+# figures_metadata.parquet columns read by upload_images_to_anthropic
+_UPLOAD_COLUMNS = ["id", "image_path", "page_index", "image_index", "caption", "has_caption", "width", "height"]
+# get_chunks reads files on up to _CHUNK_READ_WORKERS threads once at least
+# _PARALLEL_CHUNK_READS_MIN chunks are requested; fewer are read serially
+_CHUNK_READ_WORKERS = 8
+_PARALLEL_CHUNK_READS_MIN = 4
+# Shared by all get_chunks calls, so a call does not pay for starting its own threads
+_chunk_read_pool = ThreadPoolExecutor(max_workers=_CHUNK_READ_WORKERS, thread_name_prefix="chunk-read")
+# Runs hybrid_search's lexical half while the calling thread runs the vector half
+_lexical_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="hybrid-lexical")
+# chunk path -> (mtime_ns, stripped text) of the last _CHUNK_TEXT_CACHE_SIZE chunks read,
+# least recently used first; an entry is only served while the file's mtime is unchanged
+_CHUNK_TEXT_CACHE_SIZE = 4096
+_chunk_texts: "OrderedDict[str, Tuple[int, str]]" = OrderedDict()
+_chunk_texts_lock = threading.Lock()
+# Search results are cached per search type for repeated queries: at most
+# _RESULT_CACHE_SIZE entries each, valid for _RESULT_CACHE_TTL_S seconds
+_RESULT_CACHE_SIZE = 128
+_RESULT_CACHE_TTL_S = 120.0
+# search_vector also answers a query from a cached one of the same document and k
+# whose embedding has cosine similarity >= _SEMANTIC_CACHE_MIN_SIMILARITY (rephrasings);
+# the last _SEMANTIC_CACHE_SIZE queries are kept per document, 0 turns this off
+_SEMANTIC_CACHE_SIZE = default_config.FAISS_SEMANTIC_CACHE_SIZE
+_SEMANTIC_CACHE_MIN_SIMILARITY = default_config.FAISS_SEMANTIC_CACHE_MIN_SIMILARITY
+# Pulls Whoosh and memory-mapped FAISS index files into the page cache after a session
+# loads, off the request path, so the first search does not page-fault the index in
+_index_warm_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="index-warm")
+# Concurrent Files API uploads per upload_images_to_anthropic call
+_UPLOAD_WORKERS = 8
+# Image media types by file extension; anything else is sent as PNG
+_MEDIA_TYPE_MAP = {
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.gif': 'image/gif',
+    '.webp': 'image/webp',
+}
+# Bytes read from an image's start to identify its format
+_MEDIA_SNIFF_BYTES = 16
+
 # --------- Data models ---------
-@dataclass
+@dataclass(slots=True)
 class Chunk:
     chunk_id: str
     text: str
-    metadata: Dict[str, Any]
+    metadata: Mapping[str, Any]  # read-only, shared by all chunks of a document
 
-@dataclass
+@dataclass(slots=True)
 class VectorIndex:
-    wrapper: FaissWrapper
+    wrapper: "FaissWrapper"
     loaded: bool
 
-@dataclass
+@dataclass(slots=True)
 class TextSearchIndex:
     woosh_dir: str
-    searcher: WooshSearcher
+    searcher: "WooshSearcher"
 
-@dataclass
+@dataclass(slots=True)
 class DocResources:
     doc_id: str
     vector_index: VectorIndex
-    image_captions_index: VectorIndex
     text_index: TextSearchIndex
     chunks_dir: str
     parquet_path: str
     anthropic_cache: AnthropicFileCache
+    # metadata of every Chunk returned for this document
+    chunk_metadata: Mapping[str, Any]
+    # loaded on the first image caption search
+    image_captions_index: Optional[VectorIndex] = None
+    # figure id -> figures_metadata row (_UPLOAD_COLUMNS), filled as figures are requested
+    figures_by_id: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    # every accepted chunk id form -> (file name, path) in chunks_dir, listed on first get_chunks
+    chunk_files: Optional[Dict[str, Tuple[str, str]]] = None
+    # serializes anthropic_cache reads and writes and the figures_by_id / chunk_files fills
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    # searches currently using the indexes above; once the session is evicted its indexes are
+    # closed by whichever of put() or the last search finishes with them (SessionRegistry._lock)
+    users: int = 0
+    evicted: bool = False
+
+# --------- Search result cache ---------
+class _ResultCache:
+    """Small LRU of search results whose entries also expire after `ttl` seconds.
+
+    Keys start with the doc_file_name so a document's entries can be dropped together.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Tuple[Hashable, ...], Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+
+    def get(self, key: Tuple[Hashable, ...]) -> Optional[List[Dict[str, Any]]]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def put(self, key: Tuple[Hashable, ...], value: List[Dict[str, Any]]):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def discard_doc(self, doc_file_name: str):
+        for key in [key for key in self._data if key[0] == doc_file_name]:
+            del self._data[key]
+
+class _SemanticCache:
+    """Search results keyed by query embedding, for one document.
+
+    A lookup returns the results of the most similar cached query with the same k,
+    if its cosine similarity reaches `min_similarity`. Oldest entries are overwritten first.
+    """
+
+    def __init__(self, maxsize: int, min_similarity: float):
+        self.maxsize = maxsize
+        self.min_similarity = min_similarity
+        self._vectors: Optional[np.ndarray] = None  # (maxsize, dim) unit rows, allocated on first put
+        self._ks = np.zeros(maxsize, dtype=np.int64)
+        self._results: List[Optional[List[Dict[str, Any]]]] = [None] * maxsize
+        self._size = 0
+        self._next = 0
+
+    @staticmethod
+    def _unit(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float64)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, embedding: List[float], k: int) -> Optional[List[Dict[str, Any]]]:
+        if not self._size:
+            return None
+        similarities = self._vectors[:self._size] @ self._unit(embedding)
+        similarities[self._ks[:self._size] != k] = -np.inf
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.min_similarity:
+            return None
+        return self._results[best]
+
+    def put(self, embedding: List[float], k: int, value: List[Dict[str, Any]]):
+        vector = self._unit(embedding)
+        if self._vectors is None:
+            self._vectors = np.empty((self.maxsize, vector.shape[0]), dtype=np.float64)
+        i = self._next
+        self._vectors[i] = vector
+        self._ks[i] = k
+        self._results[i] = value
+        self._next = (i + 1) % self.maxsize
+        self._size = min(self._size + 1, self.maxsize)
+
+# --------- Search hit records ---------
+def _vector_hit(metadata: Dict[str, Any], content: str, score: float) -> Dict[str, Any]:
+    get = metadata.get
+    return {
+        "chunk_number": get("chunk_number"),
+        "score": score,
+        "source": get("source"),
+        "text": content if len(content) <= 200 else content[:200] + "...",
+    }
+
+def _caption_hit(metadata: Dict[str, Any], content: str, score: float) -> Dict[str, Any]:
+    get = metadata.get
+    return {
+        "image_id": get("image_id"),
+        "image_path": get("image_path"),
+        "page_index": get("page_index"),
+        "image_index": get("image_index"),
+        "caption": content,
+        "score": score,
+        "width": get("width"),
+        "height": get("height"),
+        "has_caption": get("has_caption"),
+    }
+
+# --------- Resource loaders (run concurrently by ensure) ---------
+def _open_text_searcher(doc_file_name: str, woosh_dir: str) -> "WooshSearcher":
+    from analyzer.woosh_searcher import WooshSearcher
+    text_searcher = WooshSearcher(pdf_name=doc_file_name)
+    try:
+        text_searcher.open()
+    except FileNotFoundError:
+        logger.warning(f"Woosh index missing for {doc_file_name}: {woosh_dir}")
+    return text_searcher
+
+def _load_text_vector_index(extraction_dir: str) -> VectorIndex:
+    from analyzer.faiss_wrapper import FaissWrapper
+    faiss_wrapper = FaissWrapper()
+    loaded = faiss_wrapper.load_index(extraction_dir)
+    return VectorIndex(wrapper=faiss_wrapper, loaded=loaded)
+
+def _load_captions_vector_index(extraction_dir: str) -> VectorIndex:
+    from analyzer.faiss_wrapper import FaissWrapper
+    captions_wrapper = FaissWrapper()
+    loaded = captions_wrapper.load_image_captions_index(extraction_dir)
+    return VectorIndex(wrapper=captions_wrapper, loaded=loaded)
+
+def _list_chunk_files(chunks_dir: str) -> Optional[Dict[str, Tuple[str, str]]]:
+    """Chunk (file name, path) pairs keyed by every id form get_chunks accepts ("0001",
+    "0001.txt", "chunk_0001", "chunk_0001.txt"), from one directory read (is_file uses
+    scandir's cached type, entry.path is already joined); None if the directory is missing."""
+    try:
+        with os.scandir(chunks_dir) as entries:
+            files = [
+                (entry.name, entry.path) for entry in entries
+                if entry.name.startswith("chunk_") and entry.name.endswith(".txt") and entry.is_file()
+            ]
+    except FileNotFoundError:
+        logger.warning(f"Chunks directory missing: {chunks_dir}")
+        return None
+    chunk_files: Dict[str, Tuple[str, str]] = {}
+    for file in files:
+        fname = file[0]
+        stem = fname[:-4]
+        chunk_files[fname] = chunk_files[stem] = file
+        num = stem[6:]
+        if not num.startswith("chunk_"):  # "chunk_<num>" is read as a stem, not a bare number
+            chunk_files[num] = chunk_files[num + ".txt"] = file
+    return chunk_files
+
+# Bytes str.strip() removes that are also single-byte in UTF-8
+_ASCII_WHITESPACE = frozenset(b" \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f")
+
+def _read_chunk_text(path: str) -> str:
+    """Whole file in one read() of its size, decoded like open(path, encoding="utf-8").read().strip().
+
+    Surrounding ASCII whitespace is skipped before decoding, so the text is not
+    decoded in full and then copied again by strip().
+    """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        size = os.fstat(fd).st_size
+        # one read for a regular file: it returns all `size` bytes, so there is no
+        # second read to reach EOF; loop only if it comes back short
+        data = os.read(fd, max(size, 1 << 16))
+        parts = [data]
+        n_read = len(data)
+        while data and n_read != size:
+            data = os.read(fd, 1 << 16)
+            parts.append(data)
+            n_read += len(data)
+    finally:
+        os.close(fd)
+    data = b"".join(parts)
+    start, end = 0, len(data)
+    while start < end and data[start] in _ASCII_WHITESPACE:
+        start += 1
+    while end > start and data[end - 1] in _ASCII_WHITESPACE:
+        end -= 1
+    text = str(memoryview(data)[start:end], "utf-8")
+    if "\r" in text:
+        # universal newlines, as text-mode open() would do
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    # non-ASCII whitespace (e.g. NBSP) is rare; strip() returns text itself when there is none
+    return text.strip()
+
+def _try_read_chunk(path: str) -> Optional[str]:
+    """Stripped chunk text, or None if the file cannot be read. Repeated reads of an unchanged file are served from memory."""
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+        with _chunk_texts_lock:
+            entry = _chunk_texts.get(path)
+            if entry is not None and entry[0] == mtime_ns:
+                _chunk_texts.move_to_end(path)
+                return entry[1]
+        text = _read_chunk_text(path)
+    except Exception:
+        return None
+    with _chunk_texts_lock:
+        _chunk_texts[path] = (mtime_ns, text)
+        _chunk_texts.move_to_end(path)
+        while len(_chunk_texts) > _CHUNK_TEXT_CACHE_SIZE:
+            _chunk_texts.popitem(last=False)
+    return text
+
+def _read_chunks(
+    chunk_files: Dict[str, Tuple[str, str]], chunk_numbers: List[str]
+) -> Tuple[List[str], List[Optional[str]], bool]:
+    """File names and texts (None if unreadable) of the requested chunks found in the
+    listing, and whether the listing looks stale: a requested chunk is not in it, or a
+    listed file no longer exists."""
+    found = [chunk_files[num] for num in chunk_numbers if num in chunk_files]
+    fnames = [fname for fname, _ in found]
+    paths = [path for _, path in found]
+    # reads are independent: overlap them on a pool unless there are only a few
+    if len(paths) < _PARALLEL_CHUNK_READS_MIN:
+        texts = [_try_read_chunk(path) for path in paths]
+    else:
+        texts = list(_chunk_read_pool.map(_try_read_chunk, paths))
+    stale = len(found) < len(chunk_numbers) or any(
+        text is None and not os.path.exists(path) for path, text in zip(paths, texts)
+    )
+    return fnames, texts, stale
+
+def _close_resources(res: DocResources):
+    """Release a session's index handles now instead of whenever it is garbage-collected."""
+    closers = [res.text_index.searcher.close, res.vector_index.wrapper.close]
+    if res.image_captions_index is not None:
+        closers.append(res.image_captions_index.wrapper.close)
+    for close in closers:
+        try:
+            close()
+        except Exception as e:
+            logger.warning(f"Failed to close resources for {res.doc_id}: {e}")
+
+def _normalize_scores(scores: List[float]) -> List[float]:
+    """Scores divided by their max, all zeros when the max is not positive."""
+    arr = np.asarray(scores, dtype=np.float64)
+    if arr.size == 0:
+        return []
+    top = arr.max()
+    return (arr / top).tolist() if top > 0 else [0.0] * arr.size
+
+@lru_cache(maxsize=1)
+def _anthropic_client() -> "anthropic.Anthropic":
+    """Process-wide client, so uploads reuse its HTTP connection pool instead of a new TLS handshake per call."""
+    import anthropic
+    return anthropic.Anthropic(api_key=default_config.ANTHROPIC_API_KEY)
+
+def _sniff_media_type(header: bytes) -> Optional[str]:
+    """Media type from an image's magic bytes, or None if the format is not recognised."""
+    if header.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image/png'
+    if header.startswith(b'\xff\xd8\xff'):
+        return 'image/jpeg'
+    if header.startswith((b'GIF87a', b'GIF89a')):
+        return 'image/gif'
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'image/webp'
+    return None
+
+def _upload_one(client: "anthropic.Anthropic", image_path: str, media_type: str) -> str:
+    """Upload one image to the Anthropic Files API and return its file ID.
+    
+    The media type is taken from the file header when it is recognised; ``media_type``
+    (derived from the extension) is only the fallback, so misnamed files are labelled correctly.
+    """
+    with open(image_path, 'rb') as f:
+        media_type = _sniff_media_type(f.read(_MEDIA_SNIFF_BYTES)) or media_type
+        f.seek(0)
+        file_obj = client.beta.files.upload(
+            file=(os.path.basename(image_path), f, media_type),
+        )
+    return file_obj.id
 
 # --------- Session registry (in-memory) ---------
 class SessionRegistry:
     def __init__(self, max_sessions: int = 3):
         self.max_sessions = max_sessions
-        self._sessions: Dict[str, DocResources] = {}
-        self._lru: List[str] = []
+        # insertion order doubles as LRU order: least recently used first
+        self._sessions: "OrderedDict[str, DocResources]" = OrderedDict()
         self._active_session: str = ""
+        # search type -> cached results; a document's entries are dropped whenever
+        # its resources are (re)loaded or evicted
+        self._result_caches: Dict[str, _ResultCache] = {
+            kind: _ResultCache(_RESULT_CACHE_SIZE, _RESULT_CACHE_TTL_S)
+            for kind in ("lexical", "vector", "captions", "hybrid")
+        }
+        # doc_file_name -> search_vector results by query embedding, dropped with the above
+        self._semantic_caches: Dict[str, _SemanticCache] = {}
+        # Guards the sessions and the caches above; held only for dict work, never while
+        # loading indexes or searching
+        self._lock = threading.RLock()
+        # doc_file_name -> lock serializing loads of that document's resources, so two
+        # callers on the same new document load it once while other documents load in parallel.
+        # An entry only lives while a load is in progress
+        self._load_locks: Dict[str, threading.Lock] = {}
 
     def get(self, doc_file_name: str) -> Optional[DocResources]:
-        if doc_file_name in self._sessions:
-            # update LRU
-            self._lru = [d for d in self._lru if d != doc_file_name] + [doc_file_name]
-            return self._sessions[doc_file_name]
-        return None
+        with self._lock:
+            res = self._sessions.get(doc_file_name)
+            if res is not None:
+                # update LRU
+                self._sessions.move_to_end(doc_file_name)
+            return res
 
     def put(self, doc_file_name: str, res: DocResources):
-        if doc_file_name not in self._sessions and len(self._sessions) >= self.max_sessions:
-            # evict LRU
-            evict_id = self._lru.pop(0)
-            self._sessions.pop(evict_id, None)
-        self._sessions[doc_file_name] = res
-        self._lru = [d for d in self._lru if d != doc_file_name] + [doc_file_name]
+        # sessions dropped here that no search is using; closed once the lock is released
+        idle: List[DocResources] = []
+        with self._lock:
+            if doc_file_name not in self._sessions and len(self._sessions) >= self.max_sessions:
+                # evict LRU
+                evict_id, evicted = self._sessions.popitem(last=False)
+                self._discard_results(evict_id)
+                idle += self._retire(evicted)
+            self._discard_results(doc_file_name)
+            replaced = self._sessions.get(doc_file_name)
+            self._sessions[doc_file_name] = res
+            if replaced is not None and replaced is not res:
+                idle += self._retire(replaced)
+            self._sessions.move_to_end(doc_file_name)
+        for retired in idle:
+            _close_resources(retired)
 
     def set_active(self, doc_file_name: str):
         self._active_session = doc_file_name
@@ -99,31 +468,104 @@ class SessionRegistry:
 
     # ---------- helpers ----------
 
+    @contextmanager
+    def _loading(self, doc_file_name: str) -> Iterator[None]:
+        """Hold the document's load lock, dropping its entry when the holder is done.
+
+        Callers already waiting keep the old lock and later ones get a fresh one; the double
+        checks in ensure and _get_captions_index keep either from loading the same resources twice.
+        """
+        with self._lock:
+            lock = self._load_locks.get(doc_file_name)
+            if lock is None:
+                lock = self._load_locks[doc_file_name] = threading.Lock()
+        with lock:
+            try:
+                yield
+            finally:
+                with self._lock:
+                    if self._load_locks.get(doc_file_name) is lock:
+                        del self._load_locks[doc_file_name]
+
+    def _retire(self, res: DocResources) -> List[DocResources]:
+        """Mark a session dropped from the registry; returns it if it is ready to close.
+
+        Callers hold self._lock and close what is returned after releasing it.
+        """
+        res.evicted = True
+        return [res] if res.users == 0 else []
+
+    @contextmanager
+    def _session(self, doc_file_name: str) -> Iterator[DocResources]:
+        """The document's resources, kept open until the block exits even if evicted meanwhile."""
+        while True:
+            res = self.ensure(doc_file_name)
+            with self._lock:
+                # evicted between ensure and here: its indexes may already be closed
+                if not res.evicted:
+                    res.users += 1
+                    break
+        try:
+            yield res
+        finally:
+            with self._lock:
+                res.users -= 1
+                close = res.evicted and res.users == 0
+            if close:
+                _close_resources(res)
+
+    def _discard_results(self, doc_file_name: str):
+        for cache in self._result_caches.values():
+            cache.discard_doc(doc_file_name)
+        self._semantic_caches.pop(doc_file_name, None)
+
+    def _cached_search(
+        self,
+        kind: str,
+        key: Tuple[Hashable, ...],
+        search: Callable[[DocResources], List[Dict[str, Any]]],
+    ) -> List[Dict[str, Any]]:
+        """Serve a repeated search from the `kind` cache. Callers get their own copies of the
+        hit dicts, so mutating a result never changes the cached entry."""
+        cache = self._result_caches[kind]
+        # touches the session LRU; a (re)load drops stale entries first
+        with self._session(key[0]) as res:
+            with self._lock:
+                cached = cache.get(key)
+            if cached is None:
+                cached = search(res)
+                with self._lock:
+                    # an evicted session's entries were already discarded; keep them out
+                    if not res.evicted:
+                        cache.put(key, cached)
+        return [dict(hit) for hit in cached]
+
     def ensure(self, doc_file_name: str) -> DocResources:
+        # hot path for every search: one dict hit plus the LRU touch
         existing = self.get(doc_file_name)
-        if existing:
+        if existing is not None:
             return existing
-        extraction_dir = os.path.join(default_config.EXTRACTION_DIR, doc_file_name)
-        chunks_dir = os.path.join(extraction_dir, default_config.EXTRACTION_CHUNK_DIR)
-        parquet_path = os.path.join(extraction_dir, default_config.EXTRACTION_FIGURES_PARQUET_FILE)
-        woosh_dir = os.path.join(extraction_dir, default_config.EXTRACTION_LUCENE_INDEX_DIR)
-
-        # Lexical index
-        text_searcher = WooshSearcher(pdf_name=doc_file_name)
-        try:
-            text_searcher.open()
-        except FileNotFoundError:
-            logger.warning(f"Woosh index missing for {doc_file_name}: {woosh_dir}")
+        with self._loading(doc_file_name):
+            # another caller may have loaded it while this one waited
+            existing = self.get(doc_file_name)
+            if existing is not None:
+                return existing
+            return self._load(doc_file_name)
 
-        # Vector index for text chunks
-        faiss_wrapper = FaissWrapper()
-        loaded = faiss_wrapper.load_index(extraction_dir)
-        vector_index = VectorIndex(wrapper=faiss_wrapper, loaded=loaded)
+    def _load(self, doc_file_name: str) -> DocResources:
+        extraction_dir = os.path.join(_EXTRACTION_DIR, doc_file_name)
+        chunks_dir = os.path.join(extraction_dir, _CHUNK_DIR)
+        parquet_path = os.path.join(extraction_dir, _FIGURES_PARQUET_FILE)
+        woosh_dir = os.path.join(extraction_dir, _LUCENE_INDEX_DIR)
 
-        # Vector index for image captions
-        captions_wrapper = FaissWrapper()
-        captions_loaded = captions_wrapper.load_image_captions_index(extraction_dir)
-        image_captions_index = VectorIndex(wrapper=captions_wrapper, loaded=captions_loaded)
+        # Lexical index and text chunk vectors are independent and mostly disk I/O:
+        # load them concurrently so a cold session waits for the slower one only.
+        # Image caption vectors are left to the first caption search (_get_captions_index)
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            text_searcher_future = pool.submit(_open_text_searcher, doc_file_name, woosh_dir)
+            vector_index_future = pool.submit(_load_text_vector_index, extraction_dir)
+            text_searcher = text_searcher_future.result()
+            vector_index = vector_index_future.result()
 
         # Initialize Anthropic file cache
         anthropic_cache = AnthropicFileCache(extraction_dir)
@@ -131,15 +573,28 @@ class SessionRegistry:
         res = DocResources(
             doc_id=doc_file_name,
             vector_index=vector_index,
-            image_captions_index=image_captions_index,
             text_index=TextSearchIndex(woosh_dir=woosh_dir, searcher=text_searcher),
             chunks_dir=chunks_dir,
             parquet_path=parquet_path,
             anthropic_cache=anthropic_cache,
+            chunk_metadata=MappingProxyType({"doc_id": doc_file_name}),
         )
         self.put(doc_file_name, res)
+        _index_warm_pool.submit(text_searcher.warm)
+        if vector_index.loaded and vector_index.wrapper.mapped:
+            _index_warm_pool.submit(vector_index.wrapper.warm)
         return res
 
+    def _get_captions_index(self, res: DocResources) -> VectorIndex:
+        if res.image_captions_index is None:
+            with self._loading(res.doc_id):
+                if res.image_captions_index is None:
+                    captions_index = _load_captions_vector_index(os.path.join(_EXTRACTION_DIR, res.doc_id))
+                    if captions_index.loaded and captions_index.wrapper.mapped:
+                        _index_warm_pool.submit(captions_index.wrapper.warm)
+                    res.image_captions_index = captions_index
+        return res.image_captions_index
+
     # ---------- operations ----------
 
     def search_lexical(
@@ -151,7 +606,15 @@ class SessionRegistry:
         limit: int = 10,
         preview_chars: int = 120,
     ) -> List[Dict[str, Any]]:
-        res = self.ensure(doc_file_name)
+        return self._cached_search(
+            "lexical",
+            (doc_file_name, query, doc_type, limit, preview_chars),
+            lambda res: self._search_lexical(res, query, doc_type, limit, preview_chars),
+        )
+
+    def _search_lexical(
+        self, res: DocResources, query: str, doc_type: str, limit: int, preview_chars: int
+    ) -> List[Dict[str, Any]]:
         searcher = res.text_index.searcher
         try:
             hits = searcher.search(
@@ -162,68 +625,105 @@ class SessionRegistry:
                 max_preview_chars=preview_chars,
             )
         except Exception as e:
-            logger.error(f"Lexical search failed for {doc_file_name}: {e}")
+            logger.error(f"Lexical search failed for {res.doc_id}: {e}")
             return []
         return hits
 
     def search_vector(self, doc_file_name: str, query: str, k: int = 5) -> List[Dict[str, Any]]:
-        res = self.ensure(doc_file_name)
+        return self._cached_search(
+            "vector", (doc_file_name, query, k), lambda res: self._semantic_search_vector(res, query, k)
+        )
+
+    def _semantic_search_vector(self, res: DocResources, query: str, k: int) -> List[Dict[str, Any]]:
+        """_search_vector, answered from a near-identical earlier query when there is one
+        (never when FAISS_SEMANTIC_CACHE_SIZE is 0).
+
+        Results are shared with the caches, so only search_vector (which hands out copies) uses this.
+        """
+        vi = res.vector_index
+        if not vi.loaded or _SEMANTIC_CACHE_SIZE <= 0:
+            return self._search_vector(res, query, k)
+        try:
+            embedding = vi.wrapper.embed_query(query)
+        except Exception as e:
+            logger.warning(f"Failed to embed query for the semantic cache: {e}")
+            return self._search_vector(res, query, k)
+        with self._lock:
+            cache = self._semantic_caches.get(res.doc_id)
+            if cache is None:
+                cache = _SemanticCache(_SEMANTIC_CACHE_SIZE, _SEMANTIC_CACHE_MIN_SIMILARITY)
+                if not res.evicted:
+                    self._semantic_caches[res.doc_id] = cache
+            hits = cache.get(embedding, k)
+        if hits is None:
+            # embed_query cached the embedding, so the search does not compute it again
+            hits = self._search_vector(res, query, k)
+            with self._lock:
+                if not res.evicted:
+                    cache.put(embedding, k, hits)
+        return hits
+
+    def _search_vector(self, res: DocResources, query: str, k: int) -> List[Dict[str, Any]]:
         vi = res.vector_index
         if not vi.loaded:
-            logger.warning(f"Vector index not loaded for {doc_file_name}")
+            logger.warning(f"Vector index not loaded for {res.doc_id}")
             return []
-        raw = vi.wrapper.search(query, k=k)
-        out: List[Dict[str, Any]] = []
-        for doc, score in raw:
-            out.append({
-                "chunk_number": doc.metadata.get("chunk_number"),
-                "score": float(score),
-                "source": doc.metadata.get("source"),
-                "text": doc.page_content[:200] + ("..." if len(doc.page_content) > 200 else ""),
-            })
-        return out
+        metadatas, texts, scores = vi.wrapper.search_columns(query, k=k)
+        # Plain dicts (callers JSON-encode them and hybrid_search annotates them); the
+        # constant-key displays share interned keys, so only metadata lookups are per hit
+        return [
+            _vector_hit(metadata, text, score)
+            for metadata, text, score in zip(metadatas, texts, scores.tolist())
+        ]
 
     def get_chunks(self, doc_file_name: str, chunk_numbers: List[str]) -> List[Chunk]:
         res = self.ensure(doc_file_name)
-        chunks: List[Chunk] = []
-        for num in chunk_numbers:
-            fname = f"chunk_{num}.txt" if not num.startswith("chunk_") else num + ".txt" if not num.endswith(".txt") else num
-            path = os.path.join(res.chunks_dir, fname)
-            if not os.path.isfile(path):
-                continue
-            try:
-                with open(path, "r", encoding="utf-8") as f:
-                    text = f.read().strip()
-                chunks.append(Chunk(chunk_id=fname, text=text, metadata={"doc_id": doc_file_name}))
-            except Exception:
-                continue
-        return chunks
+        # one directory listing per session instead of a stat per requested chunk. A missing
+        # directory is not cached, and a listing that lacks a requested chunk or names a
+        # deleted file is rebuilt once, so chunks written after it are still found
+        with res.lock:
+            listed_now = res.chunk_files is None
+            if listed_now:
+                res.chunk_files = _list_chunk_files(res.chunks_dir)
+            chunk_files = res.chunk_files
+        if chunk_files is None:
+            return []
+        fnames, texts, stale = _read_chunks(chunk_files, chunk_numbers)
+        if stale and not listed_now:
+            with res.lock:
+                # unless another caller has rebuilt it meanwhile
+                if res.chunk_files is chunk_files:
+                    res.chunk_files = _list_chunk_files(res.chunks_dir)
+                chunk_files = res.chunk_files
+            if chunk_files is None:
+                return []
+            fnames, texts, _ = _read_chunks(chunk_files, chunk_numbers)
+        metadata = res.chunk_metadata
+        return [
+            Chunk(chunk_id=fname, text=text, metadata=metadata)
+            for fname, text in zip(fnames, texts)
+            if text is not None
+        ]
 
     def search_image_captions(self, doc_file_name: str, query: str, k: int = 5) -> List[Dict[str, Any]]:
         """Search image captions using FAISS vector similarity.
         
         Returns list of dicts with image metadata including path, caption, score, etc.
         """
-        res = self.ensure(doc_file_name)
-        ci = res.image_captions_index
+        return self._cached_search(
+            "captions", (doc_file_name, query, k), lambda res: self._search_image_captions(res, query, k)
+        )
+
+    def _search_image_captions(self, res: DocResources, query: str, k: int) -> List[Dict[str, Any]]:
+        ci = self._get_captions_index(res)
         if not ci.loaded:
-            logger.warning(f"Image captions vector index not loaded for {doc_file_name}")
+            logger.warning(f"Image captions vector index not loaded for {res.doc_id}")
             return []
-        raw = ci.wrapper.search(query, k=k)
-        out: List[Dict[str, Any]] = []
-        for doc, score in raw:
-            out.append({
-                "image_id": doc.metadata.get("image_id"),
-                "image_path": doc.metadata.get("image_path"),
-                "page_index": doc.metadata.get("page_index"),
-                "image_index": doc.metadata.get("image_index"),
-                "caption": doc.page_content,
-                "score": float(score),
-                "width": doc.metadata.get("width"),
-                "height": doc.metadata.get("height"),
-                "has_caption": doc.metadata.get("has_caption"),
-            })
-        return out
+        metadatas, texts, scores = ci.wrapper.search_columns(query, k=k)
+        return [
+            _caption_hit(metadata, text, score)
+            for metadata, text, score in zip(metadatas, texts, scores.tolist())
+        ]
 
     def hybrid_search(
         self,
@@ -250,61 +750,83 @@ class SessionRegistry:
         Returns:
             Combined and ranked results with normalized scores
         """
+        return self._cached_search(
+            "hybrid",
+            (doc_file_name, query, index_type, doc_type, k, lexical_weight, vector_weight),
+            lambda res: self._hybrid_search(
+                res, query, index_type, doc_type, k, lexical_weight, vector_weight
+            ),
+        )
+
+    def _hybrid_search(
+        self,
+        res: DocResources,
+        query: str,
+        index_type: str,
+        doc_type: str,
+        k: int,
+        lexical_weight: float,
+        vector_weight: float,
+    ) -> List[Dict[str, Any]]:
+        # Sub-searches bypass their caches: the merge below annotates their hits in place.
+        # Lexical results (only applicable for text search) are fetched on another thread
+        # while the vector search runs here: Whoosh is mostly I/O, FAISS releases the GIL
+        lexical_future = None
+        if index_type == "text":
+            lexical_future = _lexical_pool.submit(self._search_lexical, res, query, doc_type, k, 200)
+        
         # Get vector results
         if index_type == "captions":
-            vector_results = self.search_image_captions(doc_file_name, query, k=k)
+            vector_results = self._search_image_captions(res, query, k)
         else:
-            vector_results = self.search_vector(doc_file_name, query, k=k)
-        
-        # Get lexical results (only applicable for text search)
-        lexical_results = []
-        if index_type == "text":
-            lexical_results = self.search_lexical(
-                doc_file_name, query, doc_type=doc_type, limit=k, preview_chars=200
-            )
+            vector_results = self._search_vector(res, query, k)
+        lexical_results = lexical_future.result() if lexical_future is not None else []
         
-        # Normalize scores and combine
-        combined: Dict[str, Dict[str, Any]] = {}
+        # Normalize scores and combine. The hit dicts are built fresh by the searches
+        # above, so they are annotated in place; `position` maps a key to its entry
+        merged: List[Dict[str, Any]] = []
+        position: Dict[str, int] = {}
         
         # Process vector results
-        max_vector_score = max([r["score"] for r in vector_results], default=1.0)
-        for r in vector_results:
+        vector_normalized = _normalize_scores([r["score"] for r in vector_results])
+        for r, normalized_score in zip(vector_results, vector_normalized):
             key = r.get("chunk_number") or r.get("image_id")
             if not key:
                 continue
-            normalized_score = (r["score"] / max_vector_score) if max_vector_score > 0 else 0
-            combined[key] = {
-                **r,
-                "hybrid_score": normalized_score * vector_weight,
-                "vector_score": r["score"],
-                "lexical_score": 0.0,
-            }
+            r["hybrid_score"] = normalized_score * vector_weight
+            r["vector_score"] = r["score"]
+            r["lexical_score"] = 0.0
+            idx = position.get(key)
+            if idx is None:
+                position[key] = len(merged)
+                merged.append(r)
+            else:
+                merged[idx] = r
         
         # Process lexical results
         if lexical_results:
-            max_lexical_score = max([r.get("score", 0) for r in lexical_results], default=1.0)
-            for r in lexical_results:
+            lexical_normalized = _normalize_scores([r.get("score", 0) for r in lexical_results])
+            for r, normalized_score in zip(lexical_results, lexical_normalized):
                 key = r.get("id")
                 if not key:
                     continue
-                normalized_score = (r.get("score", 0) / max_lexical_score) if max_lexical_score > 0 else 0
                 
-                if key in combined:
+                idx = position.get(key)
+                if idx is not None:
                     # Boost items that appear in both
-                    combined[key]["hybrid_score"] += normalized_score * lexical_weight
-                    combined[key]["lexical_score"] = r.get("score", 0)
+                    entry = merged[idx]
+                    entry["hybrid_score"] += normalized_score * lexical_weight
+                    entry["lexical_score"] = r.get("score", 0)
                 else:
                     # Add lexical-only results
-                    combined[key] = {
-                        **r,
-                        "hybrid_score": normalized_score * lexical_weight,
-                        "vector_score": 0.0,
-                        "lexical_score": r.get("score", 0),
-                    }
+                    r["hybrid_score"] = normalized_score * lexical_weight
+                    r["vector_score"] = 0.0
+                    r["lexical_score"] = r.get("score", 0)
+                    position[key] = len(merged)
+                    merged.append(r)
         
-        # Sort by hybrid score and return top k
-        results = sorted(combined.values(), key=lambda x: x["hybrid_score"], reverse=True)
-        return results[:k]
+        # Top k by hybrid score (same order as a stable descending sort)
+        return heapq.nlargest(k, merged, key=lambda x: x["hybrid_score"])
 
     def upload_images_to_anthropic(
         self,
@@ -335,48 +857,65 @@ class SessionRegistry:
             logger.warning(f"Requested {len(image_ids)} images, limiting to {default_config.IMAGE_UPLOAD_LIMIT}")
             image_ids = image_ids[:default_config.IMAGE_UPLOAD_LIMIT]
         
-        # Load parquet to get image metadata
-        if not os.path.exists(res.parquet_path):
-            logger.error(f"Parquet file not found: {res.parquet_path}")
-            return {
-                "error": "Image metadata not found",
-                "file_ids": [],
-                "images": [],
-                "content_blocks": [],
-                "cached_count": 0,
-                "uploaded_count": 0,
-            }
+        # Held while figures_by_id is filled, so concurrent calls do not scan the parquet twice
+        with res.lock:
+            figures_by_id = res.figures_by_id
+            requested = list(dict.fromkeys(image_ids))  # request order, each once
+            missing = [i for i in requested if i not in figures_by_id]
         
-        try:
-            df = pd.read_parquet(res.parquet_path)
-            # Filter for requested image IDs
-            df_filtered = df[df['id'].isin(image_ids)]
-            
-            if df_filtered.empty:
-                logger.warning(f"No images found for IDs: {image_ids}")
+            # Load parquet to get image metadata (only for figures not seen in this session)
+            if missing and not os.path.exists(res.parquet_path):
+                logger.error(f"Parquet file not found: {res.parquet_path}")
                 return {
-                    "error": "No matching images found",
+                    "error": "Image metadata not found",
                     "file_ids": [],
                     "images": [],
                     "content_blocks": [],
                     "cached_count": 0,
                     "uploaded_count": 0,
                 }
+        
+            try:
+                if missing:
+                    # The id filter is checked against row-group statistics, so row groups
+                    # that cannot hold a requested id are skipped rather than decoded
+                    table = ds.dataset(res.parquet_path, format="parquet").to_table(
+                        columns=_UPLOAD_COLUMNS,
+                        filter=pc.field("id").isin(missing),
+                    )
+                    for row in table.to_pylist():
+                        figures_by_id[row['id']] = row
+                    not_found = [i for i in missing if i not in figures_by_id]
+                    if not_found:
+                        logger.warning(f"Image IDs not found in {res.parquet_path}: {not_found}")
+                rows_filtered = [figures_by_id[i] for i in requested if i in figures_by_id]
             
-        except Exception as e:
-            logger.error(f"Failed to read parquet file: {e}")
-            return {
-                "error": f"Failed to read image metadata: {str(e)}",
-                "file_ids": [],
-                "images": [],
-                "content_blocks": [],
-                "cached_count": 0,
-                "uploaded_count": 0,
-            }
+                if not rows_filtered:
+                    logger.warning(f"No images found for IDs: {image_ids}")
+                    return {
+                        "error": "No matching images found",
+                        "file_ids": [],
+                        "images": [],
+                        "content_blocks": [],
+                        "cached_count": 0,
+                        "uploaded_count": 0,
+                    }
+            
+            except Exception as e:
+                logger.error(f"Failed to read parquet file: {e}")
+                return {
+                    "error": f"Failed to read image metadata: {str(e)}",
+                    "file_ids": [],
+                    "images": [],
+                    "content_blocks": [],
+                    "cached_count": 0,
+                    "uploaded_count": 0,
+                }
         
         # Initialize Anthropic client
         try:
-            client = anthropic.Anthropic(api_key=default_config.ANTHROPIC_API_KEY)
+            client = _anthropic_client()
+            from anthropic import AuthenticationError
         except Exception as e:
             logger.error(f"Failed to initialize Anthropic client: {e}")
             return {
@@ -394,51 +933,74 @@ class SessionRegistry:
         cached_count = 0
         uploaded_count = 0
         
-        # Process each image
-        for _, row in df_filtered.iterrows():
-            image_id = row['id']
-            image_path = row['image_path']
-            
-            # Check cache first
-            cached = cache.get(image_id)
-            if cached:
-                logger.debug(f"Using cached file ID for image {image_id}: {cached.file_id}")
-                file_id = cached.file_id
-                cached_count += 1
-            else:
-                # Upload to Anthropic
-                if not os.path.exists(image_path):
-                    logger.warning(f"Image file not found: {image_path}")
-                    continue
+        # Resolve cached file IDs first; the remaining images are uploaded below
+        file_id_by_image: Dict[str, str] = {}
+        to_upload: List[Dict[str, Any]] = []
+        with res.lock:
+            for row in rows_filtered:
+                image_id = row['id']
+                image_path = row['image_path']
                 
-                try:
-                    # Determine media type from extension
-                    ext = os.path.splitext(image_path)[1].lower()
-                    media_type_map = {
-                        '.png': 'image/png',
-                        '.jpg': 'image/jpeg',
-                        '.jpeg': 'image/jpeg',
-                        '.gif': 'image/gif',
-                        '.webp': 'image/webp',
-                    }
-                    media_type = media_type_map.get(ext, 'image/png')
-                    
-                    # Upload file
-                    with open(image_path, 'rb') as f:
-                        file_obj = client.beta.files.upload(
-                            file=(os.path.basename(image_path), f, media_type),
-                        )
-                    
-                    file_id = file_obj.id
-                    logger.info(f"Uploaded image {image_id} to Anthropic: {file_id}")
+                # Check cache first
+                cached = cache.get(image_id)
+                if cached:
+                    logger.debug(f"Using cached file ID for image {image_id}: {cached.file_id}")
+                    file_id_by_image[image_id] = cached.file_id
+                    cached_count += 1
+                elif not os.path.exists(image_path):
+                    logger.warning(f"Image file not found: {image_path}")
+                else:
+                    to_upload.append(row)
+        
+        # Uploads are network round-trips: run them concurrently, update the cache on this thread
+        if to_upload:
+            with ThreadPoolExecutor(max_workers=min(_UPLOAD_WORKERS, len(to_upload))) as pool:
+                # Extension-based media types; _upload_one corrects them from the file header
+                media_types = [
+                    _MEDIA_TYPE_MAP.get(os.path.splitext(row['image_path'])[1].lower(), 'image/png')
+                    for row in to_upload
+                ]
+                futures = {
+                    pool.submit(_upload_one, client, row['image_path'], media_type): row
+                    for row, media_type in zip(to_upload, media_types)
+                }
+                for future in as_completed(futures):
+                    row = futures[future]
+                    try:
+                        file_id = future.result()
+                    except AuthenticationError as e:
+                        # A bad or rotated key: drop the cached client so the next call
+                        # builds one from the current key, and skip the remaining uploads
+                        _anthropic_client.cache_clear()
+                        for pending in futures:
+                            pending.cancel()
+                        logger.error(f"Anthropic authentication failed: {e}")
+                        return {
+                            "error": f"Anthropic authentication failed: {str(e)}",
+                            "file_ids": [],
+                            "images": [],
+                            "content_blocks": [],
+                            "cached_count": cached_count,
+                            "uploaded_count": uploaded_count,
+                        }
+                    except Exception as e:
+                        logger.error(f"Failed to upload image {row['image_path']}: {e}")
+                        continue
+                    logger.info(f"Uploaded image {row['id']} to Anthropic: {file_id}")
                     
-                    # Cache the file ID
-                    cache.set(image_id, file_id, image_path)
+                    # Cache the file ID; set() rewrites the cache file, one writer at a time
+                    with res.lock:
+                        cache.set(row['id'], file_id, row['image_path'])
+                    file_id_by_image[row['id']] = file_id
                     uploaded_count += 1
-                    
-                except Exception as e:
-                    logger.error(f"Failed to upload image {image_path}: {e}")
-                    continue
+        
+        # Assemble results in request order
+        for row in rows_filtered:
+            image_id = row['id']
+            image_path = row['image_path']
+            file_id = file_id_by_image.get(image_id)
+            if file_id is None:
+                continue
             
             # Collect metadata
             file_ids.append(file_id)